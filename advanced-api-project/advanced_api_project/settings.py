@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Helpers shared with social_media_api live in the repository's `common` package.
+REPO_ROOT = BASE_DIR.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+from common.db import DEFAULT_PRAGMAS, sqlite_databases  # noqa: E402
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -54,11 +62,25 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
-    ]
+    ],
+    # orjson when installed, DRF's json otherwise (common/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'common.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'common.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
     # Keeping defaults for now; we’ll add filtering/search/ordering config in later tasks.
 
 MIDDLEWARE = [
+    # Outermost: query count / timings for the whole request (common/instrumentation.py)
+    'common.instrumentation.RequestMetricsMiddleware',
+    # gzip/deflate (br/zstd when installed) above a size threshold (common/compression.py)
+    'common.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,12 +113,19 @@ WSGI_APPLICATION = 'advanced_api_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Writer ('default') + read-only 'replica' alias on the same SQLite file, both
+# tuned with SQLITE_PRAGMAS on connect (see common/db.py). `migrate` switches the
+# file to WAL once (api/migrations/0005_enable_wal.py).
+# Connections persist for DB_CONN_MAX_AGE seconds with health checks; usage is
+# reported by the connection-stats endpoint (common/pooling.py).
+
+SQLITE_PRAGMAS = {**DEFAULT_PRAGMAS}
+
+DB_CONN_MAX_AGE = 600
+
+DATABASES = sqlite_databases(BASE_DIR / 'db.sqlite3', pragmas=SQLITE_PRAGMAS, conn_max_age=DB_CONN_MAX_AGE)
+
+DATABASE_ROUTERS = ['common.db.ReadWriteRouter']
 
 
 # Password validation
@@ -135,6 +164,39 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The book list/detail response cache (api/cache.py) works with any backend,
+# e.g. 'django.core.cache.backends.filebased.FileBasedCache' for multi-process setups.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+API_RESPONSE_CACHE = 'default'
+API_RESPONSE_CACHE_TIMEOUT = 300  # seconds
+
+
+# Response compression (common/compression.py), JSON only: HTML is left alone (BREACH).
+# Compressed bodies of cached responses are kept in the response cache too, so
+# they are built once.
+
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,  # bytes
+    'ENCODINGS': ['br', 'zstd', 'gzip', 'deflate'],  # preference order; br/zstd need brotli/zstandard
+    'LEVELS': {'br': 5, 'zstd': 3, 'gzip': 6, 'deflate': 6},
+    'CACHE': API_RESPONSE_CACHE,
+}
+
+
+# Request instrumentation (common/instrumentation.py): what to do when a view
+# exceeds its `request_budget`: 'log' a warning or 'raise' BudgetExceeded.
+
+REQUEST_BUDGET_ACTION = 'log'
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,62 @@
+# api/benchmark.py
+"""
+Catalog seeding for `manage.py benchmark_api` (timing, query counting and
+the report live in common/benchmark.py).
+
+How it works:
+- `seed_catalog()` bulk-inserts authors and books in batches, then rebuilds
+  the search index once (bulk_create skips the per-row signals).
+  `seed_deletable()` tops the catalog up so the delete scenarios never run
+  out of rows.
+"""
+import random
+
+from .cache import bump_catalog_version
+from .models import Author, Book
+from .search import BookSearchIndex
+
+WORDS = (
+    "river night garden stone shadow empire winter silver ocean fire city "
+    "glass storm forest crown letter island memory summer dream house song "
+    "iron secret journey mountain window harbor paper lantern"
+).split()
+
+
+def seed_catalog(books, authors=None, batch_size=10000, seed=0):
+    rng = random.Random(seed)
+    authors = authors or max(1, books // 50)
+
+    for start in range(0, authors, batch_size):
+        Author.objects.bulk_create(
+            Author(name=f"{rng.choice(WORDS).title()} Author {i}")
+            for i in range(start, min(start + batch_size, authors))
+        )
+    author_ids = list(Author.objects.values_list('pk', flat=True))
+
+    for start in range(0, books, batch_size):
+        Book.objects.bulk_create(
+            Book(
+                title=" ".join(rng.choice(WORDS) for _ in range(3)).title() + f" {i}",
+                publication_year=rng.randint(1900, 2024),
+                author_id=rng.choice(author_ids),
+            )
+            for i in range(start, min(start + batch_size, books))
+        )
+
+    BookSearchIndex().rebuild()
+    bump_catalog_version()
+
+
+def seed_deletable(count, seed=0, batch_size=10000):
+    """Adds `count` books for the delete scenarios to consume; returns their ids."""
+    rng = random.Random(seed)
+    author_ids = list(Author.objects.values_list('pk', flat=True))
+    books = Book.objects.bulk_create(
+        (Book(title=f"Deletable {i}", publication_year=rng.randint(1900, 2024), author_id=rng.choice(author_ids))
+         for i in range(count)),
+        batch_size=batch_size,
+    )
+    book_ids = [book.pk for book in books]
+    BookSearchIndex().index_books(book_ids)
+    bump_catalog_version()
+    return book_ids
@@ -0,0 +1,163 @@
+# api/bulk.py
+from django.db import DatabaseError, router, transaction
+from django.utils import timezone
+
+from .cache import bump_catalog_version_on_commit
+from .models import Author, Book
+from .search import BookSearchIndex
+from .serializers import BookBulkSerializer, parse_id
+
+
+class BulkBookWriter:
+    """
+    Validates and writes many Book rows per request.
+
+    How it works:
+    - Every item is validated with BookBulkSerializer in a single pass. Author
+      ids (and, for updates, the target books) are loaded with one `in_bulk()`
+      query up front instead of one query per item.
+    - Valid items are written with `bulk_create`/`bulk_update`/`delete` in
+      batches of `batch_size`, each batch in its own transaction.
+    - Invalid items, or items of a batch that fails in the database, are
+      reported in the results by their position in the payload; they never
+      abort the rest of the request.
+    - Bulk writes skip model signals (deletes too), so the search index is
+      refreshed explicitly for the written ids, one statement per batch, and
+      the response cache is invalidated on commit.
+    """
+
+    def __init__(self, batch_size=500, using=None):
+        self.batch_size = batch_size
+        self.using = using or router.db_for_write(Book)
+
+    def create(self, items):
+        results = [None] * len(items)
+        context = {"authors": self._load_authors(items)}
+        valid = []
+        for index, item in enumerate(items):
+            serializer = BookBulkSerializer(data=item, context=context)
+            if serializer.is_valid():
+                valid.append((index, Book(**serializer.validated_data)))
+            else:
+                results[index] = _error(index, serializer.errors)
+
+        for batch in self._batches(valid):
+            books = [book for _, book in batch]
+            try:
+                with transaction.atomic(using=self.using):
+                    Book.objects.using(self.using).bulk_create(books)
+            except DatabaseError as exc:
+                for index, _ in batch:
+                    results[index] = _error(index, {"non_field_errors": [str(exc)]})
+                continue
+            BookSearchIndex(using=self.using).index_books(book.pk for book in books)
+            bump_catalog_version_on_commit(self.using)
+            for index, book in batch:
+                results[index] = {"index": index, "status": "created", "id": book.pk}
+        return results
+
+    def update(self, items, partial=False):
+        results = [None] * len(items)
+        context = {"authors": self._load_authors(items)}
+        # Ids are checked before they reach a set (unhashable) or the database (out of range).
+        ids = {item.get("id") for item in items if isinstance(item, dict) and _is_id(item.get("id"))}
+        existing = Book.objects.using(self.using).in_bulk(ids)
+
+        valid, fields, seen = [], set(), set()
+        for index, item in enumerate(items):
+            pk = item.get("id") if isinstance(item, dict) else None
+            book = existing.get(pk) if _is_id(pk) else None
+            if book is None:
+                results[index] = _error(index, {"id": ["Book not found."]})
+                continue
+            if pk in seen:
+                results[index] = _error(index, {"id": ["Duplicate id in request."]})
+                continue
+            seen.add(pk)
+            serializer = BookBulkSerializer(book, data=item, partial=partial, context=context)
+            if not serializer.is_valid():
+                results[index] = _error(index, serializer.errors)
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(book, attr, value)
+                fields.add(attr)
+            valid.append((index, book))
+
+        # bulk_update() does not run auto_now, so stamp updated_at ourselves.
+        now = timezone.now()
+        for _, book in valid:
+            book.updated_at = now
+        fields.add("updated_at")
+
+        for batch in self._batches(valid):
+            books = [book for _, book in batch]
+            try:
+                with transaction.atomic(using=self.using):
+                    Book.objects.using(self.using).bulk_update(books, sorted(fields))
+            except DatabaseError as exc:
+                for index, _ in batch:
+                    results[index] = _error(index, {"non_field_errors": [str(exc)]})
+                continue
+            BookSearchIndex(using=self.using).index_books(book.pk for book in books)
+            bump_catalog_version_on_commit(self.using)
+            for index, book in batch:
+                results[index] = {"index": index, "status": "updated", "id": book.pk}
+        return results
+
+    def delete(self, ids):
+        results = [None] * len(ids)
+        valid = []
+        for index, pk in enumerate(ids):
+            if _is_id(pk):
+                valid.append((index, pk))
+            else:
+                results[index] = _error(index, {"id": ["A valid integer is required."]})
+
+        deleted = False
+        for batch in self._batches(valid):
+            pks = [pk for _, pk in batch]
+            try:
+                with transaction.atomic(using=self.using):
+                    found = set(Book.objects.using(self.using)
+                                .filter(pk__in=pks).values_list("pk", flat=True))
+                    if found:
+                        # Nothing references Book, so skip the Collector and its
+                        # per-row post_delete (one FTS DELETE + version bump each).
+                        Book.objects.using(self.using).filter(pk__in=found)._raw_delete(self.using)
+                        BookSearchIndex(using=self.using).remove_books(found)
+            except DatabaseError as exc:
+                for index, _ in batch:
+                    results[index] = _error(index, {"non_field_errors": [str(exc)]})
+                continue
+            deleted = deleted or bool(found)
+            for index, pk in batch:
+                if pk in found:
+                    results[index] = {"index": index, "status": "deleted", "id": pk}
+                else:
+                    results[index] = _error(index, {"id": ["Book not found."]})
+        if deleted:
+            bump_catalog_version_on_commit(self.using)
+        return results
+
+    def _load_authors(self, items):
+        ids = set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            pk = parse_id(item.get("author"))
+            if pk is not None:
+                ids.add(pk)
+        return Author.objects.using(self.using).in_bulk(ids)
+
+    def _batches(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            yield rows[start:start + self.batch_size]
+
+
+def _is_id(value):
+    # Positive and within SQLite's 64-bit INTEGER range.
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value < 2 ** 63
+
+
+def _error(index, errors):
+    return {"index": index, "status": "error", "errors": errors}
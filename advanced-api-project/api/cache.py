@@ -0,0 +1,98 @@
+# api/cache.py
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+VERSION_KEY = "api:catalog:version"
+
+
+def get_cache():
+    return caches[getattr(settings, "API_RESPONSE_CACHE", "default")]
+
+
+def catalog_version():
+    """Current catalog version; every Book/Author write bumps it."""
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """
+    Invalidates every cached response at once: keys embed the version, so
+    old entries simply stop being read and expire on their own.
+    """
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 2, timeout=None)
+
+
+def bump_catalog_version_on_commit(using=None):
+    """
+    Bumps the version when the current transaction commits (right away
+    outside one). Bumping earlier would let a concurrent reader cache
+    pre-commit rows under the new version until the next write.
+    """
+    transaction.on_commit(bump_catalog_version, using=using)
+
+
+def response_cache_key(request, view_name):
+    params = sorted((key, sorted(request.query_params.getlist(key)))
+                    for key in request.query_params)
+    raw = f"{request.get_host()}|{request.path}|{params}"
+    digest = sha1(raw.encode()).hexdigest()
+    return f"api:response:{catalog_version()}:{view_name}:{digest}"
+
+
+class CachedResponseMixin:
+    """
+    Caches successful list/retrieve response data per normalized URL.
+
+    How it works:
+    - The key is built from the host, path and sorted query params (filters,
+      search, ordering, cursor/page_size) plus the catalog version.
+    - A hit skips the database and the serializer entirely; only rendering
+      runs again, so content negotiation keeps working.
+    - `post_save`/`post_delete` on Book and Author bump the version
+      (see api/signals.py), which invalidates without scanning keys.
+    - Works with any Django cache backend (local-memory, file-based, ...).
+    - JSON responses carry `compression_cache_key`, so CompressionMiddleware
+      stores their compressed bodies under the same versioned key
+      (see common/compression.py). Other renderers (the browsable API) show
+      the current user, so their bodies aren't shared and don't get the key.
+    """
+    cache_timeout = None  # falls back to settings.API_RESPONSE_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = response_cache_key(request, type(self).__name__)
+        timeout = self.cache_timeout
+        if timeout is None:
+            timeout = getattr(settings, "API_RESPONSE_CACHE_TIMEOUT", 300)
+        cached = cache.get(key)
+        if cached is not None:
+            response = Response(cached)
+            response["X-Cache"] = "HIT"
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout)
+            response["X-Cache"] = "MISS"
+        if request.accepted_renderer.format == "json":
+            response.compression_cache_key = key
+            response.compression_cache_timeout = timeout
+        return response
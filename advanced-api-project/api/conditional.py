@@ -0,0 +1,91 @@
+# api/conditional.py
+from hashlib import sha1
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_cache, response_cache_key
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag / Last-Modified support for list and detail views.
+
+    How it works:
+    - Validators come from a cheap aggregate over the filtered queryset
+      (`MAX(updated_at)` + `COUNT(*)`), never from the serialized body. For a
+      detail view the queryset is narrowed to the requested pk first.
+    - The ETag also covers the normalized query string and the negotiated
+      media type, so every distinct representation has its own tag.
+    - A matching `If-None-Match` (or a fresh `If-Modified-Since`) returns 304
+      before the serializer runs.
+    - Validators are cached under the catalog version (see api/cache.py), so a
+      repeat poll with no intervening write costs no query at all.
+    - Views whose representation includes related rows extend
+      `get_fingerprint_querysets()`.
+    - Last-Modified is only sent for a single object without related rows
+      (`last_modified_header`): deleting a row doesn't advance
+      `MAX(updated_at)`, so lists revalidate on the ETag (which includes the
+      count) alone.
+    """
+    last_modified_header = True
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        if not self.sends_last_modified():
+            last_modified = None
+        if etag is not None:
+            not_modified = get_conditional_response(
+                request, etag=etag,
+                last_modified=int(last_modified) if last_modified is not None else None,
+            )
+            if not_modified is not None:
+                return not_modified
+
+        response = super().get(request, *args, **kwargs)
+        if etag is not None and response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_fingerprint_querysets(self, queryset):
+        return [queryset]
+
+    def sends_last_modified(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.last_modified_header and lookup_url_kwarg in self.kwargs
+
+    def get_validators(self, request):
+        cache = get_cache()
+        key = response_cache_key(request, f"{type(self).__name__}:validators")
+        fingerprint = cache.get(key)
+        if fingerprint is None:
+            fingerprint = self.compute_fingerprint()
+            cache.set(key, fingerprint)
+
+        count, last_modified = fingerprint
+        if count is None:
+            return None, None
+        params = sorted((k, sorted(request.query_params.getlist(k))) for k in request.query_params)
+        raw = f"{request.path}|{params}|{request.accepted_media_type}|{count}|{last_modified}"
+        return f'"{sha1(raw.encode()).hexdigest()}"', last_modified
+
+    def compute_fingerprint(self):
+        """Returns `(row count, last modification timestamp)`, or `(None, None)` for a missing object."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+        count, last_modified = 0, None
+        for index, qs in enumerate(self.get_fingerprint_querysets(queryset)):
+            stats = qs.order_by().aggregate(count=Count("pk"), last=Max("updated_at"))
+            if index == 0 and lookup_url_kwarg in self.kwargs and not stats["count"]:
+                return None, None
+            count += stats["count"]
+            if stats["last"] is not None:
+                stamp = stats["last"].timestamp()
+                last_modified = stamp if last_modified is None else max(last_modified, stamp)
+        return count, last_modified
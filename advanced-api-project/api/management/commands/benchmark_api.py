@@ -0,0 +1,155 @@
+import json
+import random
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.benchmark import seed_catalog, seed_deletable, WORDS
+from api.cache import get_cache
+from api.models import Author, Book
+from common.benchmark import environment, run_endpoint, scratch_database, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a scratch database with N books and benchmarks the books API "
+        "through the test client; prints p50/p95/p99 latency, req/s and "
+        "queries/request per endpoint as JSON. Write scenarios run as an "
+        "authenticated user; scenarios run in the order listed, with deletes "
+        "last so the others never target a deleted book. If a scenario fails, "
+        "the results of those that finished are still reported."
+    )
+
+    # Scenarios that need an authenticated client.
+    writes = {'book-create', 'book-update', 'book-delete',
+              'books-bulk-create', 'books-bulk-update', 'books-bulk-delete'}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=10000,
+                            help="Books to seed (10k-1M is the intended range).")
+        parser.add_argument('--authors', type=int, default=None, help="Defaults to books / 50.")
+        parser.add_argument('--requests', type=int, default=200, help="Timed requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--endpoints', nargs='*', help="Subset of endpoint names to run.")
+        parser.add_argument('--no-cache', action='store_true',
+                            help="Clear the response cache before every request.")
+        parser.add_argument('--on-disk', action='store_true',
+                            help="Use a temporary database file instead of in-memory SQLite.")
+        parser.add_argument('--bulk-size', type=int, default=100, help="Items per bulk request.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+
+    def handle(self, *args, **options):
+        report = {
+            'environment': environment(),
+            'config': {key: options[key] for key in ('books', 'requests', 'bulk_size', 'no_cache', 'on_disk', 'seed')},
+            'endpoints': {},
+        }
+        try:
+            with scratch_database(on_disk=options['on_disk']):
+                seed_catalog(options['books'], options['authors'], seed=options['seed'])
+                self.run(options, report['endpoints'])
+        except Exception as exc:
+            if report['endpoints']:
+                # Keep what already finished; a long run shouldn't be lost to its last scenario.
+                report['error'] = str(exc)
+                self.write_report(report, options)
+            raise
+        self.write_report(report, options)
+
+    def write_report(self, report, options):
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def run(self, options, results):
+        """Runs the selected scenarios, adding each summary to `results` as it finishes."""
+        reader, writer = APIClient(), APIClient()
+        writer.force_authenticate(User.objects.create_user('benchmark'))
+        scenarios = self.scenarios(random.Random(options['seed']), options['bulk_size'])
+
+        unknown = set(options['endpoints'] or ()) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}. "
+                               f"Choose from: {', '.join(scenarios)}")
+        selected = [name for name in scenarios if not options['endpoints'] or name in options['endpoints']]
+        self.reserve_deletes(selected, options)
+
+        before_each = get_cache().clear if options['no_cache'] else None
+        for name in selected:
+            caches['default'].clear()
+            samples = run_endpoint(writer if name in self.writes else reader, scenarios[name],
+                                   options['requests'], warmup=options['warmup'], before_each=before_each,
+                                   after_each=self.follow_next if name == 'books-keyset-walk' else None)
+            results[name] = summarize(*samples)
+            self.stderr.write(f"{name}: p50 {results[name]['latency_ms']['p50']} ms, "
+                              f"{results[name]['req_per_s']} req/s")
+        return results
+
+    def reserve_deletes(self, selected, options):
+        """Seeds enough extra books up front for every delete request (warmup included)."""
+        calls = options['requests'] + options['warmup']
+        needed = sum(calls * (options['bulk_size'] if name == 'books-bulk-delete' else 1)
+                     for name in selected if name in ('book-delete', 'books-bulk-delete'))
+        if needed > len(self.doomed):
+            # Popped last, so the seeded catalog is deleted from first.
+            self.doomed[:0] = seed_deletable(needed - len(self.doomed), seed=options['seed'])
+
+    def scenarios(self, rng, bulk_size):
+        """Each scenario maps a request index to (method, path, extra)."""
+        book_ids = list(Book.objects.values_list('pk', flat=True))
+        author_ids = list(Author.objects.values_list('pk', flat=True))
+        # Deletes pop from a shuffled copy so every request removes a book that still exists.
+        self.doomed = rng.sample(book_ids, len(book_ids))
+        books_url = reverse('book-list')
+        self.walk_next = None
+
+        def keyset_walk(i):
+            # Follows `next` links so deep pages are measured too; restarts at the end.
+            return 'GET', self.walk_next or f"{books_url}?page_size=50", {}
+
+        def new_book():
+            return {'title': " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+                    'publication_year': rng.randint(1900, 2024), 'author': rng.choice(author_ids)}
+
+        def take(count):
+            if len(self.doomed) < count:
+                raise CommandError("Ran out of books to delete; seed more with --books.")
+            return [self.doomed.pop() for _ in range(count)]
+
+        def body(method, path, payload):
+            return method, path, {'data': json.dumps(payload), 'content_type': 'application/json'}
+
+        return {
+            'books-page': lambda i: ('GET', f"{books_url}?page_size=50", {}),
+            'books-keyset-walk': keyset_walk,
+            'books-search': lambda i: ('GET', f"{books_url}?search={rng.choice(WORDS)}&page_size=50", {}),
+            'books-filter-year': lambda i: ('GET', f"{books_url}?publication_year={rng.randint(1900, 2024)}&page_size=50", {}),
+            'books-order-year': lambda i: ('GET', f"{books_url}?ordering=-publication_year&page_size=50", {}),
+            'book-detail': lambda i: ('GET', reverse('book-detail', args=[rng.choice(book_ids)]), {}),
+            'author-detail': lambda i: ('GET', reverse('author-detail', args=[rng.choice(author_ids)]), {}),
+            'books-batch': lambda i: ('GET', f"{reverse('book-batch')}?ids="
+                                             f"{','.join(map(str, rng.sample(book_ids, min(50, len(book_ids)))))}", {}),
+            'books-export': lambda i: ('GET', reverse('book-export'), {}),
+            'book-create': lambda i: body('POST', reverse('book-create'), new_book()),
+            'book-update': lambda i: body('PATCH', reverse('book-update', args=[rng.choice(book_ids)]),
+                                          {'title': new_book()['title']}),
+            'books-bulk-create': lambda i: body('POST', reverse('book-bulk'),
+                                                [new_book() for _ in range(bulk_size)]),
+            'books-bulk-update': lambda i: body('PATCH', reverse('book-bulk'), [
+                {'id': pk, 'title': new_book()['title']}
+                for pk in rng.sample(book_ids, min(bulk_size, len(book_ids)))
+            ]),
+            'book-delete': lambda i: ('DELETE', reverse('book-delete', args=take(1)), {}),
+            'books-bulk-delete': lambda i: body('DELETE', reverse('book-bulk'), take(bulk_size)),
+        }
+
+    def follow_next(self, response):
+        self.walk_next = response.json().get('next')
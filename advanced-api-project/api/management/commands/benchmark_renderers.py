@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmark import seed_catalog
+from api.compiled import compile_serializer
+from api.management.commands.benchmark_serializers import best_of
+from api.models import Book
+from api.serializers import BookSerializer
+from common.benchmark import environment, scratch_database
+from common.renderers import FastJSONRenderer, iter_json_array, orjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares encode time and payload size of DRF's JSONRenderer, "
+        "FastJSONRenderer and streamed array encoding (common/renderers.py) "
+        "for BookListView rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='*', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs per measurement.")
+        parser.add_argument('--on-disk', action='store_true')
+
+    def handle(self, *args, **options):
+        results = {}
+        compiled = compile_serializer(BookSerializer)
+        with scratch_database(on_disk=options['on_disk']):
+            seed_catalog(max(options['rows']))
+            for rows in options['rows']:
+                # The same data BookListView renders, without pagination.
+                data = compiled.serialize(compiled.values(Book.objects.order_by('title', 'id')[:rows]))
+                results[f"books[{rows}]"] = self.compare(data, options['repeat'])
+
+        self.stdout.write(json.dumps({
+            'environment': {**environment(), 'orjson': getattr(orjson, '__version__', None)},
+            'results': results,
+        }, indent=2))
+
+    def compare(self, data, repeat):
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        payloads = {
+            'stdlib': stdlib.render(data),
+            'fast': fast.render(data),
+            'streamed': b''.join(iter_json_array(data)),
+        }
+        timings = {
+            'stdlib': best_of(repeat, lambda: stdlib.render(data)),
+            'fast': best_of(repeat, lambda: fast.render(data)),
+            'streamed': best_of(repeat, lambda: b''.join(iter_json_array(data))),
+        }
+        return {
+            'rows': len(data),
+            'identical': payloads['stdlib'] == payloads['fast'] == payloads['streamed'],
+            **{f"{name}_ms": round(timings[name] * 1000, 2) for name in timings},
+            **{f"{name}_bytes": len(payloads[name]) for name in payloads},
+            'speedup': round(timings['stdlib'] / timings['fast'], 2),
+        }
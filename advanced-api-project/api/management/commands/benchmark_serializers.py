@@ -0,0 +1,59 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.benchmark import seed_catalog
+from api.compiled import compile_serializer
+from api.models import Author, Book
+from api.serializers import AuthorSerializer, BookSerializer
+from common.benchmark import environment, scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares rows/sec of the regular DRF serializers and their compiled "
+        "read-only versions (api/compiled.py) for books and authors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100000)
+        parser.add_argument('--page-sizes', type=int, nargs='*', default=[100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs per measurement.")
+        parser.add_argument('--on-disk', action='store_true')
+
+    def handle(self, *args, **options):
+        results = {}
+        with scratch_database(on_disk=options['on_disk']):
+            seed_catalog(options['books'])
+            for size in options['page_sizes']:
+                books = Book.objects.order_by('title', 'id')[:size]
+                authors = Author.objects.order_by('name', 'id')[:max(1, size // 50)]
+                results[f"books[{size}]"] = self.compare(
+                    BookSerializer, books, lambda qs: qs, len(books), options['repeat'])
+                results[f"authors[{authors.count()}]"] = self.compare(
+                    AuthorSerializer, authors, lambda qs: qs.prefetch_related('books'),
+                    authors.count(), options['repeat'])
+
+        self.stdout.write(json.dumps({'environment': environment(), 'results': results}, indent=2))
+
+    def compare(self, serializer_class, queryset, prepare, rows, repeat):
+        compiled = compile_serializer(serializer_class)
+        drf = best_of(repeat, lambda: serializer_class(prepare(queryset.all()), many=True).data)
+        fast = best_of(repeat, lambda: compiled.serialize(compiled.values(queryset.all())))
+        return {
+            'rows': rows,
+            'drf_rows_per_s': round(rows / drf),
+            'compiled_rows_per_s': round(rows / fast),
+            'speedup': round(drf / fast, 2),
+        }
+
+
+def best_of(repeat, run):
+    # Includes the query, as a list view would.
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
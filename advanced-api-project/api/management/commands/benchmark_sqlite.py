@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.db import DEFAULT_PRAGMAS, pragma_statements
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs concurrent readers and writers against a scratch SQLite file, once "
+        "with sqlite3 defaults and once with WAL + SQLITE_PRAGMAS + BEGIN IMMEDIATE, "
+        "and reports throughput and 'database is locked' errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds per configuration.")
+        parser.add_argument('--rows', type=int, default=10000, help="Rows seeded before the run.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        tuned = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+        configs = [
+            # Django's stock sqlite3 connection: rollback journal, deferred
+            # transactions, 5 s busy timeout.
+            ('defaults', {}, 'DEFERRED', {}),
+            # WAL is set once per file by the enable_wal migration in the app.
+            ('tuned', {'journal_mode': 'WAL', **tuned}, 'IMMEDIATE', {**tuned, 'query_only': 'ON'}),
+        ]
+        results = {}
+        for label, writer_pragmas, begin, reader_pragmas in configs:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                seed(path, options['rows'])
+                results[label] = run(path, options, writer_pragmas, begin, reader_pragmas)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for label, result in results.items():
+            self.stdout.write(
+                f"{label:>8}: {result['reads_per_s']:>9.0f} reads/s  {result['writes_per_s']:>7.0f} writes/s  "
+                f"{result['locked_errors']} locked errors"
+            )
+
+
+def connect(path, pragmas):
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+    for statement in pragma_statements(pragmas):
+        # journal_mode can't be changed from a query_only connection; the writer sets it.
+        if not (pragmas.get('query_only') and 'journal_mode' in statement):
+            conn.execute(statement)
+    return conn
+
+
+def seed(path, rows):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("CREATE TABLE book (id INTEGER PRIMARY KEY, title TEXT NOT NULL, year INTEGER NOT NULL)")
+    conn.execute("CREATE INDEX book_year ON book (year)")
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO book (title, year) VALUES (?, ?)",
+                     ((f"Book {i}", 1900 + i % 120) for i in range(rows)))
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def run(path, options, writer_pragmas, begin, reader_pragmas):
+    # The first writer connection switches the file to WAL before any reader opens it.
+    connect(path, writer_pragmas).close()
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'locked_errors': 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        conn = connect(path, reader_pragmas)
+        n = 0
+        while not stop.is_set():
+            try:
+                conn.execute("SELECT id, title FROM book WHERE year = ? ORDER BY id LIMIT 20",
+                             (1900 + n % 120,)).fetchall()
+            except sqlite3.OperationalError:
+                bump('locked_errors')
+            else:
+                bump('reads')
+            n += 1
+        conn.close()
+
+    def writer():
+        conn = connect(path, writer_pragmas)
+        while not stop.is_set():
+            try:
+                # Read-then-write, as a Django save() on a fetched row does.
+                conn.execute(f"BEGIN {begin}")
+                row = conn.execute("SELECT max(id) FROM book").fetchone()
+                conn.execute("INSERT INTO book (title, year) VALUES (?, ?)", (f"Book {row[0] + 1}", 2000))
+                conn.execute("COMMIT")
+            except sqlite3.OperationalError:
+                bump('locked_errors')
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            else:
+                bump('writes')
+        conn.close()
+
+    threads = ([threading.Thread(target=reader) for _ in range(options['readers'])]
+               + [threading.Thread(target=writer) for _ in range(options['writers'])])
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(options['duration'])
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'reads_per_s': counts['reads'] / elapsed,
+        'writes_per_s': counts['writes'] / elapsed,
+        'locked_errors': counts['locked_errors'],
+        'readers': options['readers'],
+        'writers': options['writers'],
+        'seconds': round(elapsed, 3),
+    }
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.search import BookSearchIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index over Book.title and Author.name."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        index = BookSearchIndex(using=options['database'])
+        if not index.is_available():
+            self.stdout.write("Full-text index is not available on this database; nothing to do.")
+            return
+        index.rebuild()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
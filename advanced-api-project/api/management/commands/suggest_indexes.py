@@ -0,0 +1,181 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models, transaction
+from django.db.migrations import AddIndex, Migration
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.utils.module_loading import import_string
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Proposes composite indexes for a list view from its filterset_fields, "
+        "ordering_fields and default ordering, and optionally shows the "
+        "EXPLAIN QUERY PLAN before/after or writes a migration."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('view', nargs='?', default='api.views.BookListView',
+                            help="Dotted path of the DRF list view to analyse.")
+        parser.add_argument('--explain', action='store_true',
+                            help="Show query plans without and with the proposed indexes "
+                                 "(indexes are created inside a rolled-back transaction).")
+        parser.add_argument('--write-migration', action='store_true',
+                            help="Write an AddIndex migration for the proposed indexes.")
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        try:
+            view = import_string(options['view'])
+        except ImportError as exc:
+            raise CommandError(str(exc))
+
+        model = view.queryset.model
+        proposals = propose_indexes(view)
+        if not proposals:
+            self.stdout.write("No missing indexes for the declared filters/orderings.")
+            return
+
+        self.stdout.write(f"Proposed indexes for {options['view']}:")
+        for target, index in proposals:
+            self.stdout.write(f"  {target._meta.label}: {index.name} ON ({', '.join(index.fields)})")
+
+        if options['explain']:
+            self.explain(view, model, proposals, options['database'])
+
+        if options['write_migration']:
+            self.write_migration(proposals)
+
+    def explain(self, view, model, proposals, using):
+        connection = connections[using]
+        queries = representative_queries(view, model, using)
+
+        self.stdout.write("\nBefore:")
+        self.print_plans(queries)
+        try:
+            with transaction.atomic(using=using):
+                # Plain CREATE INDEX statements; SQLite rolls DDL back with the transaction.
+                editor = connection.schema_editor()
+                with connection.cursor() as cursor:
+                    for target, index in proposals:
+                        cursor.execute(str(index.create_sql(target, editor)))
+                self.stdout.write("\nAfter:")
+                self.print_plans(queries)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def print_plans(self, queries):
+        for label, queryset in queries:
+            self.stdout.write(f"  {label}")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+
+    def write_migration(self, proposals):
+        by_app = {}
+        for target, index in proposals:
+            by_app.setdefault(target._meta.app_label, []).append((target, index))
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        for app_label, items in by_app.items():
+            leaves = loader.graph.leaf_nodes(app_label)
+            number = max((MigrationAutodetector.parse_number(name) or 0 for _, name in leaves), default=0) + 1
+            migration = Migration(f"{number:04d}_suggested_indexes", app_label)
+            migration.dependencies = leaves
+            migration.operations = [
+                AddIndex(model_name=target._meta.model_name, index=index) for target, index in items
+            ]
+            writer = MigrationWriter(migration)
+            with open(writer.path, 'w') as fh:
+                fh.write(writer.as_string())
+            self.stdout.write(self.style.SUCCESS(f"\nWrote {writer.path}"))
+
+        self.stdout.write("Add the same entries to each model's Meta.indexes so the model state matches:")
+        for target, index in proposals:
+            fields = ", ".join(repr(f) for f in index.fields)
+            self.stdout.write(f"  {target.__name__}: models.Index(fields=[{fields}], name={index.name!r}),")
+
+
+def propose_indexes(view):
+    """
+    Returns `(model, Index)` pairs not already covered by the model.
+
+    Rules:
+    - Every ordering key gets `(key, id)` so ORDER BY and keyset seeks walk
+      the index instead of sorting.
+    - Every local equality filter gets `(field, *default ordering, id)` so the
+      filtered rows come out already sorted.
+    - A filter through a relation (`author__name`) gets a single-column index
+      on the related model's field, plus `(fk, *default ordering, id)` on the
+      view's model so the joined rows come out sorted.
+    """
+    model = view.queryset.model
+    default_ordering = [f.lstrip('-') for f in (view.ordering or model._meta.ordering)]
+    ordering_fields = [f for f in (view.ordering_fields or []) if f != '__all__']
+
+    wanted = []
+    for field in ordering_fields + default_ordering:
+        wanted.append((model, [field, 'id']))
+    for lookup in getattr(view, 'filterset_fields', None) or []:
+        parts = lookup.split('__')
+        if len(parts) == 1:
+            columns = [lookup] + [f for f in default_ordering if f != lookup] + ['id']
+            wanted.append((model, columns))
+        else:
+            target = model
+            for part in parts[:-1]:
+                target = target._meta.get_field(part).related_model
+            wanted.append((target, [parts[-1]]))
+            wanted.append((model, [parts[0]] + default_ordering + ['id']))
+
+    proposals, seen = [], set()
+    for target, columns in wanted:
+        key = (target, tuple(columns))
+        if key in seen or _is_covered(target, columns):
+            continue
+        seen.add(key)
+        proposals.append((target, models.Index(fields=columns, name=_index_name(target, columns))))
+    return proposals
+
+
+def representative_queries(view, model, using):
+    """One query per declared filter and ordering, shaped like BookListView's."""
+    default_ordering = view.ordering or model._meta.ordering
+    queryset = view.queryset.using(using)
+    queries = []
+    for lookup in getattr(view, 'filterset_fields', None) or []:
+        queries.append((f"filter {lookup}", queryset.filter(**{lookup: _sample(model, lookup)})
+                        .order_by(*default_ordering, 'id')))
+    for field in view.ordering_fields or []:
+        queries.append((f"order by {field}", queryset.order_by(field, 'id')[:20]))
+    return queries
+
+
+def _is_covered(model, columns):
+    """True when an existing index (or unique/FK column) already starts with `columns`."""
+    for index in model._meta.indexes:
+        if list(index.fields[:len(columns)]) == columns:
+            return True
+    if len(columns) == 1:
+        field = model._meta.get_field(columns[0])
+        return field.primary_key or field.unique or field.db_index
+    return False
+
+
+def _index_name(model, columns):
+    # Django caps index names at 30 characters.
+    name = f"{model._meta.model_name[:6]}_{'_'.join(c[:8] for c in columns)}_idx"
+    return name[:30]
+
+
+def _sample(model, lookup):
+    target = model
+    parts = lookup.split('__')
+    for part in parts[:-1]:
+        target = target._meta.get_field(part).related_model
+    field = target._meta.get_field(parts[-1])
+    return 0 if isinstance(field, (models.IntegerField, models.AutoField)) else ''
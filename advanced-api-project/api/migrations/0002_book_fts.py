@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from api.search import BookSearchIndex
+    BookSearchIndex(using=schema_editor.connection.alias).create()
+
+
+def drop_index(apps, schema_editor):
+    from api.search import BookSearchIndex
+    BookSearchIndex(using=schema_editor.connection.alias).drop()
+
+
+class Migration(migrations.Migration):
+    """
+    Creates the SQLite FTS5 table behind FullTextSearchFilter.
+    No-op on other database engines.
+    """
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
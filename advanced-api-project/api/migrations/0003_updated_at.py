@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last modification time; drives ETag/Last-Modified.'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last modification time; drives ETag/Last-Modified.'),
+        ),
+    ]
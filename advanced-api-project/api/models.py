@@ -10,9 +10,17 @@ class Author(models.Model):
         max_length=255,
         help_text="Author's full name.",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last modification time; drives ETag/Last-Modified.",
+    )
 
     class Meta:
         ordering = ["name"]
+        # Backs the `author__name` filter (see `manage.py suggest_indexes`).
+        indexes = [
+            models.Index(fields=["name"], name="author_name_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -34,9 +42,21 @@ class Book(models.Model):
         related_name="books",
         help_text="Link to the Author who wrote this book.",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last modification time; drives ETag/Last-Modified.",
+    )
 
     class Meta:
         ordering = ["title"]
+        # Match BookListView's filters/orderings so ORDER BY and keyset seeks
+        # walk an index instead of sorting (see `manage.py suggest_indexes`).
+        indexes = [
+            models.Index(fields=["title", "id"], name="book_title_id_idx"),
+            models.Index(fields=["publication_year", "id"], name="book_publicat_id_idx"),
+            models.Index(fields=["author", "title", "id"], name="book_author_title_id_idx"),
+            models.Index(fields=["publication_year", "title", "id"], name="book_publicat_title_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.publication_year})"
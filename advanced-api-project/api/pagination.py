@@ -0,0 +1,181 @@
+# api/pagination.py
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (a.k.a. seek) pagination over the queryset's current ordering.
+
+    How it works:
+    - The ordering is read from the queryset *after* the filter backends ran,
+      so `?ordering=` from OrderingFilter and the view's default `ordering`
+      are both honoured. `id` is appended as a tie-breaker so every row has a
+      unique position.
+    - The cursor stores the ordering values of the last (or first) row of the
+      page. The next page is fetched with a row-value style predicate such as
+      `title > 'X' OR (title = 'X' AND id > 7)` instead of OFFSET, so page
+      1000 costs the same as page 1.
+    - Pagination is opt-in: without `?page_size=` (and with no PAGE_SIZE in
+      settings) the view keeps returning a plain list.
+
+    The ordering keys must be non-nullable columns.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    tie_breaker = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request)
+
+        reverse = False
+        if cursor is not None:
+            if cursor['o'] != self.ordering or len(cursor['v']) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            reverse = cursor['r']
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [_flip(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.seek_predicate(ordering, cursor['v']))
+
+        # Fetch one extra row to know whether there is another page.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                pass
+            else:
+                if size > 0:
+                    return min(size, self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """
+        Returns the effective ordering as a list of field names, ending with
+        the tie-breaker. Falls back to the model's Meta.ordering when the
+        queryset is unordered.
+        """
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        ordering = [field for field in ordering if isinstance(field, str)]
+        ordering = ['id' if field == 'pk' else '-id' if field == '-pk' else field
+                    for field in ordering]
+        if not any(field.lstrip('-') == self.tie_breaker for field in ordering):
+            ordering.append(self.tie_breaker)
+        return ordering
+
+    def seek_predicate(self, ordering, values):
+        """
+        Builds `(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...` for the given
+        ordering, using `<` for descending keys.
+        """
+        clauses = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = [Q(**{ordering[i].lstrip('-'): values[i]}) for i in range(index)]
+            clauses.append(reduce(and_, equal + [Q(**{f'{name}__{lookup}': values[index]})]))
+        return reduce(or_, clauses)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Paged back past the start: nothing precedes the cursor, so the first page is next.
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Paged past the end: step back from the start of the data.
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        values = [getattr(instance, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'o': self.ordering, 'v': values, 'r': reverse},
+                             separators=(',', ':'))
+        token = urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(token.encode()).decode())
+            if not isinstance(cursor['o'], list) or not isinstance(cursor['v'], list):
+                raise ValueError
+            # Only column values may reach the seek filter.
+            if not all(_is_scalar(value) for value in cursor['v']):
+                raise ValueError
+            cursor['r'] = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+
+def _is_scalar(value):
+    if isinstance(value, int):
+        return -2 ** 63 <= value < 2 ** 63  # SQLite INTEGER range
+    return isinstance(value, (str, float))
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
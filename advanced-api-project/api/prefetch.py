@@ -0,0 +1,73 @@
+# api/prefetch.py
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def related_lookups(serializer_class, prefix=""):
+    """
+    Walks a serializer's declared fields and returns the
+    `(select_related, prefetch_related)` lookups needed to serialize a
+    queryset without per-row queries.
+
+    - A nested serializer or related field on a forward FK / one-to-one
+      becomes `select_related` (a JOIN).
+    - A `many=True` serializer or related field on a reverse FK / M2M becomes
+      `prefetch_related` (one extra query per relation, not per row).
+    - Nested serializers are walked recursively, so `books__author` is found
+      when BookSerializer itself nests the author.
+    - PrimaryKeyRelatedField on a forward FK reads `<field>_id` and needs
+      nothing.
+    """
+    select, prefetch = [], []
+    model = serializer_class.Meta.model
+    for field in serializer_class().fields.values():
+        if field.source == "*" or "." in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = f"{prefix}{field.source}"
+        many = model_field.one_to_many or model_field.many_to_many
+        child = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(field, serializers.ManyRelatedField):
+            child = field.child_relation
+
+        if many:
+            prefetch.append(lookup)
+        elif isinstance(child, serializers.PrimaryKeyRelatedField):
+            continue
+        else:
+            select.append(lookup)
+
+        if isinstance(child, serializers.ModelSerializer):
+            nested_select, nested_prefetch = related_lookups(type(child), prefix=f"{lookup}__")
+            if many:
+                # Anything below a prefetch has to be prefetched as well.
+                prefetch.extend(nested_select + nested_prefetch)
+            else:
+                select.extend(nested_select)
+                prefetch.extend(nested_prefetch)
+    return select, prefetch
+
+
+def optimize_queryset(queryset, serializer_class):
+    select, prefetch = related_lookups(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class PrefetchRelatedMixin:
+    """
+    Generic-view mixin that applies `optimize_queryset()` for the view's
+    serializer class, so nested relations are loaded in bulk.
+    """
+
+    def get_queryset(self):
+        return optimize_queryset(super().get_queryset(), self.get_serializer_class())
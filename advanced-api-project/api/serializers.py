@@ -1,16 +1,30 @@
 # api/serializers.py
 from datetime import date
 from rest_framework import serializers
+
+from common.fieldsets import SparseFieldsetsMixin
+from common.instrumentation import TimedSerializerMixin
 from .models import Author, Book
 
 
-class BookSerializer(serializers.ModelSerializer):
+class AuthorSummarySerializer(serializers.ModelSerializer):
+    """Author without their books; used for `?expand=author` on books."""
+    class Meta:
+        model = Author
+        fields = ["id", "name"]
+
+
+class BookSerializer(SparseFieldsetsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializes all fields of the Book model.
 
+    Reads accept `?fields=` and `?expand=author` (see common/fieldsets.py).
+
     Custom validation:
     - publication_year must not be in the future.
     """
+    expandable_fields = {"author": AuthorSummarySerializer}
+
     class Meta:
         model = Book
         fields = ["id", "title", "publication_year", "author"]
@@ -28,7 +42,7 @@ class BookSerializer(serializers.ModelSerializer):
         return value
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Includes the author's name and a nested, read-only list of their books.
 
@@ -42,3 +56,47 @@ class AuthorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Author
         fields = ["id", "name", "books"]
+
+
+def parse_id(value):
+    """
+    A positive 64-bit id from an int or an integer string, else None.
+
+    Unlike int(), floats (1.9) and other non-integral values are rejected.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        pk = int(value)
+    except ValueError:
+        return None
+    return pk if 0 < pk < 2 ** 63 else None
+
+
+class BulkAuthorField(serializers.PrimaryKeyRelatedField):
+    """
+    Author id field for bulk payloads.
+
+    Looks the id up in `context['authors']` (an `{id: Author}` map loaded once
+    per request) instead of issuing one query per item. Falls back to the
+    normal PrimaryKeyRelatedField lookup when no map is given.
+    """
+    def to_internal_value(self, data):
+        authors = self.context.get("authors")
+        if authors is None:
+            return super().to_internal_value(data)
+        pk = parse_id(data)
+        if pk is None:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        author = authors.get(pk)
+        if author is None:
+            self.fail("does_not_exist", pk_value=data)
+        return author
+
+
+class BookBulkSerializer(BookSerializer):
+    """
+    BookSerializer for one item of a bulk request.
+    Same fields and validation, but the author is resolved from a preloaded map.
+    """
+    author = BulkAuthorField(queryset=Author.objects.all())
@@ -0,0 +1,39 @@
+# api/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version_on_commit
+from .models import Author, Book
+from .search import BookSearchIndex
+
+
+# Keep the full-text search index in step with Book/Author writes.
+# Cascaded deletes (Author -> Books) send post_delete for every Book.
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        BookSearchIndex(using=using).index_books([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, using=None, **kwargs):
+    BookSearchIndex(using=using).remove_books([instance.pk])
+
+
+@receiver(post_save, sender=Author)
+def reindex_author(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if not raw and not created:
+        BookSearchIndex(using=using).rename_author(instance.pk, instance.name)
+
+
+# Any catalog write invalidates the cached book responses and validators
+# (see api/cache.py) once it commits.
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_catalog_cache(sender, raw=False, using=None, **kwargs):
+    if not raw:
+        bump_catalog_version_on_commit(using)
@@ -1,13 +1,49 @@
+import gzip
+import json
+import os
+import random
+import tempfile
+import zlib
+from base64 import urlsafe_b64encode
+from contextlib import nullcontext
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, router, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
+
+from common.benchmark import percentile, run_endpoint, scratch_database, summarize
+from common.compression import negotiate
+from common.db import enable_wal
+from common.instrumentation import BudgetExceeded, histogram
+from common.renderers import FastJSONRenderer, iter_json_array
+from .benchmark import seed_catalog
+from .compiled import compile_serializer
+from .management.commands.benchmark_api import Command as BenchmarkCommand
+from .management.commands.suggest_indexes import propose_indexes
 from .models import Author, Book
+from .prefetch import related_lookups
+from .serializers import AuthorSerializer, BookSerializer
+from .cache import catalog_version, get_cache
+from .views import AuthorListView, BookListView
+from .testing import QueryScalingAssertionsMixin
 
 class BookAPITestCase(APITestCase):
     """Unit tests for Book API endpoints"""
 
     def setUp(self):
+        get_cache().clear()
         # Create test user
         self.user = User.objects.create_user(username='testuser', password='password123')
         self.client = APIClient()
@@ -79,3 +115,843 @@ class BookAPITestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data[0]['publication_year'], 1958)
+
+
+class BookKeysetPaginationTestCase(APITestCase):
+    """Keyset pagination on the book list endpoint"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name="Ngozi Adichie")
+        # Duplicate titles exercise the id tie-breaker
+        for year, title in [(2003, "Purple Hibiscus"), (2006, "Half of a Yellow Sun"),
+                            (2009, "The Thing Around Your Neck"), (2013, "Americanah"),
+                            (2014, "Americanah"), (2017, "Dear Ijeawele")]:
+            Book.objects.create(title=title, publication_year=year, author=self.author)
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [book['id'] for book in response.data['results']]
+            url = response.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_unpaginated_without_page_size(self):
+        response = self.client.get(reverse('book-list'))
+        self.assertEqual(len(response.data), 6)
+
+    def test_walks_default_ordering(self):
+        ids, pages = self.walk(reverse('book-list') + "?page_size=2")
+        expected = list(Book.objects.order_by('title', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_walks_descending_ordering_with_filters(self):
+        url = reverse('book-list') + "?page_size=1&ordering=-publication_year&search=americ"
+        ids, _ = self.walk(url)
+        expected = list(Book.objects.filter(title__icontains="americ")
+                        .order_by('-publication_year', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse('book-list') + "?page_size=2")
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_cursor_uses_seek_not_offset(self):
+        first = self.client.get(reverse('book-list') + "?page_size=2")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('book-list') + "?page_size=2&cursor=garbage")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def cursor(self, values, reverse):
+        payload = json.dumps({'o': ['title', 'id'], 'v': values, 'r': reverse})
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def test_non_scalar_cursor_values(self):
+        for values in ([{'a': 1}, 1], ["A", [1]], ["A", 2 ** 70], [None, 1]):
+            url = reverse('book-list') + "?page_size=2&cursor=" + self.cursor(values, False)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND, values)
+
+    def test_reverse_cursor_before_first_row(self):
+        url = reverse('book-list') + "?page_size=2&cursor=" + self.cursor(["A", 0], True)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNone(response.data['previous'])
+        first = self.client.get(response.data['next'])
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertEqual(first.data['results'][0]['title'], "Americanah")
+
+
+class BookFullTextSearchTestCase(APITestCase):
+    """Full-text search index behind the book list `?search=`"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name="Wole Soyinka")
+        self.book1 = Book.objects.create(title="The Lion and the Jewel", publication_year=1959, author=self.author)
+        self.book2 = Book.objects.create(title="Death and the King's Horseman", publication_year=1975, author=self.author)
+
+    def search(self, term):
+        response = self.client.get(reverse('book-list') + f"?search={term}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book['id'] for book in response.data]
+
+    def test_search_matches_author_name_and_title_prefix(self):
+        self.assertEqual(len(self.search("soyinka")), 2)
+        self.assertEqual(self.search("hors"), [self.book2.id])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.book1.title = "Kongi's Harvest"
+        self.book1.save()
+        self.assertEqual(self.search("lion"), [])
+        self.assertEqual(self.search("harvest"), [self.book1.id])
+
+        self.author.name = "Akinwande Oluwole Soyinka"
+        self.author.save()
+        self.assertEqual(len(self.search("akinwande")), 2)
+
+        self.book2.delete()
+        self.assertEqual(self.search("death"), [])
+
+    def test_results_are_ranked(self):
+        # "jewel" in title and author name outranks a single title match
+        other = Author.objects.create(name="Jewel Author")
+        best = Book.objects.create(title="Jewel", publication_year=2000, author=other)
+        self.assertEqual(self.search("jewel")[0], best.id)
+
+
+class AuthorAPITestCase(QueryScalingAssertionsMixin, APITestCase):
+    """Author endpoints and their nested-books query count"""
+
+    def setUp(self):
+        get_cache().clear()
+
+    def grow(self, size):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(size):
+                author = Author.objects.create(name=f"Author {Author.objects.count()}")
+                Book.objects.create(title=f"{author.name} I", publication_year=2000, author=author)
+                Book.objects.create(title=f"{author.name} II", publication_year=2001, author=author)
+
+    def test_list_authors_with_nested_books(self):
+        self.grow(2)
+        response = self.client.get(reverse('author-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data[0]['books']), 2)
+
+    def test_retrieve_author(self):
+        self.grow(1)
+        author = Author.objects.get()
+        response = self.client.get(reverse('author-detail', args=[author.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['books']), 2)
+
+    def test_author_list_queries_do_not_scale(self):
+        self.assertQueriesDoNotScale(self.grow, lambda: self.client.get(reverse('author-list')))
+
+    def test_assertion_detects_n_plus_one(self):
+        with self.assertRaises(AssertionError):
+            self.assertQueriesDoNotScale(
+                self.grow, lambda: AuthorSerializer(Author.objects.all(), many=True).data
+            )
+
+    def test_related_lookups_from_serializer(self):
+        self.assertEqual(related_lookups(AuthorSerializer), ([], ['books']))
+        self.assertEqual(related_lookups(BookSerializer), ([], []))
+
+
+class BookBulkAPITestCase(APITestCase):
+    """Bulk create/update/delete endpoint"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='bulkuser', password='password123')
+        self.client.login(username='bulkuser', password='password123')
+        self.author = Author.objects.create(name="Buchi Emecheta")
+        self.url = reverse('book-bulk')
+
+    def test_bulk_create_reports_per_item_errors(self):
+        payload = [
+            {"title": "The Joys of Motherhood", "publication_year": 1979, "author": self.author.id},
+            {"title": "Future Book", "publication_year": 9999, "author": self.author.id},
+            {"title": "Second Class Citizen", "publication_year": 1974, "author": 424242},
+            {"title": "The Bride Price", "publication_year": 1976, "author": self.author.id},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['succeeded'], 2)
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['created', 'error', 'error', 'created'])
+        self.assertIn('publication_year', response.data['results'][1]['errors'])
+        self.assertIn('author', response.data['results'][2]['errors'])
+        self.assertEqual(Book.objects.count(), 2)
+        # Validation does not query per item
+        self.assertLess(len(queries), 12)
+        # Bulk-created rows are searchable
+        search = self.client.get(reverse('book-list') + "?search=bride")
+        self.assertEqual(len(search.data), 1)
+
+    def test_bulk_update_and_delete(self):
+        book1 = Book.objects.create(title="In the Ditch", publication_year=1972, author=self.author)
+        book2 = Book.objects.create(title="Kehinde", publication_year=1994, author=self.author)
+
+        response = self.client.patch(self.url, [
+            {"id": book1.id, "publication_year": 1973},
+            {"id": 424242, "publication_year": 1990},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        book1.refresh_from_db()
+        self.assertEqual(book1.publication_year, 1973)
+
+        response = self.client.delete(self.url, [book1.id, book2.id], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_bulk_rejects_malformed_ids(self):
+        book = Book.objects.create(title="Kehinde", publication_year=1994, author=self.author)
+        response = self.client.patch(self.url, [
+            {"id": [book.id], "publication_year": 1995},
+            {"id": {"pk": book.id}},
+            {"id": 2 ** 70, "author": 2 ** 70},
+            {"id": book.id, "publication_year": 1995},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r['status'] for r in response.data['results']], ['error', 'error', 'error', 'updated'])
+
+        response = self.client.delete(self.url, [[book.id], 2 ** 70, -1], format='json')
+        self.assertEqual(response.data['succeeded'], 0)
+        self.assertTrue(Book.objects.filter(pk=book.pk).exists())
+
+    def test_bulk_delete_does_per_batch_work_not_per_row(self):
+        Book.objects.bulk_create(Book(title=f"Rains {i}", publication_year=2000, author=self.author)
+                                 for i in range(20))
+        ids = list(Book.objects.values_list('pk', flat=True))
+        with self.captureOnCommitCallbacks() as callbacks, CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(self.url, ids, format='json')
+        self.assertEqual(response.data['succeeded'], 20)
+        self.assertEqual(sum('DELETE FROM api_book_fts' in q['sql'] for q in queries.captured_queries), 1)
+        self.assertEqual(len(callbacks), 1)  # one catalog version bump
+        self.assertEqual(self.client.get(reverse('book-list') + "?search=rains").data, [])
+
+    def test_bulk_author_must_be_an_integer(self):
+        response = self.client.post(self.url, [
+            {"title": "Destination Biafra", "publication_year": 1982, "author": self.author.id + 0.9},
+            {"title": "Destination Biafra", "publication_year": 1982, "author": f"{self.author.id}.9"},
+            {"title": "Destination Biafra", "publication_year": 1982, "author": str(self.author.id)},
+        ], format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], ['error', 'error', 'created'])
+        self.assertIn('author', response.data['results'][0]['errors'])
+
+    def test_bulk_requires_list(self):
+        response = self.client.post(self.url, {"title": "x"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookExportTestCase(APITestCase):
+    """Streaming NDJSON/CSV export"""
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Ama Ata Aidoo")
+        Book.objects.create(title="Our Sister Killjoy", publication_year=1977, author=self.author)
+        Book.objects.create(title="Changes", publication_year=1991, author=self.author)
+
+    def test_ndjson_export_applies_ordering(self):
+        response = self.client.get(reverse('book-export') + "?ordering=-publication_year")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ["Changes", "Our Sister Killjoy"])
+        self.assertEqual(rows[0]['author_name'], "Ama Ata Aidoo")
+
+    def test_csv_export_applies_filters(self):
+        response = self.client.get(reverse('book-export') + "?output=csv&publication_year=1977")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,title,publication_year,author,author_name")
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Our Sister Killjoy", lines[1])
+
+    def test_json_export_is_one_array(self):
+        response = self.client.get(reverse('book-export') + "?output=json&ordering=title")
+        self.assertEqual(response['Content-Type'], 'application/json')
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([row['title'] for row in rows], ["Changes", "Our Sister Killjoy"])
+
+    def test_unknown_output(self):
+        response = self.client.get(reverse('book-export') + "?output=xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_with_search(self):
+        response = self.client.get(reverse('book-export') + "?search=killjoy")
+        rows = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(rows), 1)
+
+
+class BookResponseCacheTestCase(APITestCase):
+    """Versioned response cache on book list/detail"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name="Ben Okri")
+        self.book = Book.objects.create(title="The Famished Road", publication_year=1991, author=self.author)
+
+    def test_second_request_is_served_from_cache(self):
+        url = reverse('book-list') + "?ordering=title&search=road"
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data[0]['title'], "The Famished Road")
+
+    def test_version_is_bumped_when_the_write_commits(self):
+        url = reverse('book-list')
+        before = catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title="Starbook", publication_year=2015, author=self.author)
+            # A reader caching now stores its data under the old version.
+            self.assertEqual(catalog_version(), before)
+            self.client.get(url)
+        self.assertGreater(catalog_version(), before)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data), 2)
+
+    def test_query_params_are_normalized(self):
+        self.client.get(reverse('book-list') + "?ordering=title&search=road")
+        response = self.client.get(reverse('book-list') + "?search=road&ordering=title")
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_writes_invalidate(self):
+        url = reverse('book-detail', args=[self.book.id])
+        self.client.get(url)
+        self.book.title = "Songs of Enchantment"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], "Songs of Enchantment")
+
+        self.client.get(reverse('book-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Author.objects.create(name="Helon Habila")
+        self.assertEqual(self.client.get(reverse('book-list'))['X-Cache'], 'MISS')
+
+
+class ConditionalGetTestCase(APITestCase):
+    """ETag / Last-Modified on book and author resources"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name="Nnedi Okorafor")
+        self.book = Book.objects.create(title="Binti", publication_year=2015, author=self.author)
+
+    def assertRevalidates(self, url, last_modified=False):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual('Last-Modified' in response, last_modified)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        return etag
+
+    def test_book_detail_and_list_return_304(self):
+        self.assertRevalidates(reverse('book-detail', args=[self.book.id]), last_modified=True)
+        self.assertRevalidates(reverse('book-list') + "?search=binti")
+
+    def test_list_is_not_stale_after_delete(self):
+        lagoon = Book.objects.create(title="Lagoon", publication_year=2014, author=self.author)
+        url = reverse('book-list')
+        detail = self.client.get(reverse('book-detail', args=[self.book.id]))
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            lagoon.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag,
+                                   HTTP_IF_MODIFIED_SINCE=detail['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=detail['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_etag_changes_after_write(self):
+        url = reverse('book-list')
+        etag = self.assertRevalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title="Lagoon", publication_year=2014, author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_author_etag_covers_nested_books(self):
+        url = reverse('author-detail', args=[self.author.id])
+        etag = self.assertRevalidates(url)
+        self.book.title = "Binti: Home"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_not_modified_skips_serialization(self):
+        url = reverse('author-list')
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+    def test_missing_book_still_404(self):
+        response = self.client.get(reverse('book-detail', args=[424242]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class YearFirstBookView(BookListView):
+    """A BookListView variant whose default ordering is not indexed yet"""
+    ordering = ['-publication_year']
+
+
+class SuggestIndexesCommandTestCase(APITestCase):
+    """`manage.py suggest_indexes`"""
+
+    def test_book_list_view_is_fully_indexed(self):
+        self.assertEqual(propose_indexes(BookListView), [])
+
+    def test_proposes_and_explains_missing_indexes(self):
+        proposals = propose_indexes(YearFirstBookView)
+        self.assertIn(['author', 'publication_year', 'id'], [list(index.fields) for _, index in proposals])
+
+        out = StringIO()
+        call_command('suggest_indexes', 'api.test_views.YearFirstBookView', '--explain', stdout=out)
+        self.assertIn("Before:", out.getvalue())
+        self.assertIn("After:", out.getvalue())
+        # The EXPLAIN run rolls its indexes back
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(cursor, 'api_book')
+        for _, index in proposals:
+            self.assertNotIn(index.name, existing)
+
+
+class ReadWriteRoutingTestCase(QueryScalingAssertionsMixin, TransactionTestCase):
+    """common.db: replica reads, writer writes, WAL set once by migration"""
+    databases = {'default', 'replica'}
+
+    def test_reads_use_replica_outside_transactions(self):
+        self.assertEqual(router.db_for_read(Book), 'replica')
+        self.assertEqual(router.db_for_write(Book), 'default')
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Book), 'default')
+
+    def test_replica_sees_committed_writes_and_rejects_its_own(self):
+        author = Author.objects.create(name="Replica Author")
+        self.assertEqual(Author.objects.get(pk=author.pk)._state.db, 'replica')
+        with self.assertRaises(OperationalError):
+            with connections['replica'].cursor() as cursor:
+                cursor.execute("DELETE FROM api_author")
+
+    def test_query_scaling_counts_replica_reads(self):
+        def grow(size):
+            for i in range(size):
+                Book.objects.create(title=f"Scaling {i}", publication_year=2000,
+                                    author=Author.objects.create(name=f"Scaling {i}"))
+
+        def n_plus_one():
+            # Outside a transaction these reads all go to the replica.
+            return AuthorSerializer(Author.objects.all(), many=True).data
+
+        with self.assertRaises(AssertionError):
+            self.assertQueriesDoNotScale(grow, n_plus_one)
+        with self.assertRaises(AssertionError):
+            self.assertQueriesDoNotScale(grow, n_plus_one, using='replica')
+        self.assertEqual(self.assertQueriesDoNotScale(grow, n_plus_one, using='default'), 0)
+
+    def test_pragmas_are_applied_on_connect(self):
+        with connections['default'].cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+        with connections['replica'].cursor() as cursor:
+            cursor.execute("PRAGMA query_only")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_wal_is_enabled_by_migration_not_on_connect(self):
+        self.assertNotIn('journal_mode', connections['default'].settings_dict['OPTIONS']['init_command'])
+        with tempfile.TemporaryDirectory() as tmp:
+            scratch = connections.create_connection('default')
+            scratch.settings_dict = {**scratch.settings_dict, 'NAME': os.path.join(tmp, 'scratch.sqlite3')}
+            with scratch.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                self.assertEqual(cursor.fetchone()[0], 'delete')
+                enable_wal(None, SimpleNamespace(connection=scratch))
+                cursor.execute("PRAGMA journal_mode")
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+            scratch.close()
+
+
+class ConnectionStatsTestCase(APITestCase):
+    """common/pooling.py and the connection-stats endpoint"""
+
+    def test_requests_reuse_the_persistent_connection(self):
+        admin = User.objects.create_superuser(username='admin', password='password123')
+        self.client.force_authenticate(admin)
+        url = reverse('connection-stats')
+        before = self.client.get(url).data
+        after = self.client.get(url).data
+        self.assertGreater(after['reused'], before['reused'])
+        self.assertEqual(after['aliases']['default']['max_age'], 600)
+        self.assertTrue(after['aliases']['default']['health_checks'])
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(User.objects.create_user(username='plain', password='password123'))
+        self.assertEqual(self.client.get(reverse('connection-stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(REQUEST_BUDGET_ACTION='raise')
+class RequestBudgetTestCase(APITestCase):
+    """common/instrumentation.py: Server-Timing, histogram and per-view budgets"""
+
+    def setUp(self):
+        get_cache().clear()
+        author = Author.objects.create(name="Budget Author")
+        Book.objects.bulk_create(
+            Book(title=f"Book {i}", publication_year=2000, author=author) for i in range(20)
+        )
+        self.author = author
+
+    def test_read_endpoints_stay_within_budget(self):
+        urls = [
+            reverse('book-list'),
+            reverse('book-list') + '?page_size=5',
+            reverse('book-list') + '?search=book',
+            reverse('book-detail', args=[Book.objects.first().pk]),
+            reverse('author-list'),
+            reverse('author-detail', args=[self.author.pk]),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=')
+
+    def test_histogram_records_per_view(self):
+        histogram.reset()
+        self.client.get(reverse('book-list'))
+        self.client.get(reverse('book-list'))
+        entry = histogram.snapshot()['book-list']
+        self.assertEqual(entry['count'], 2)
+        self.assertEqual(sum(entry['buckets'].values()), 2)
+        self.assertGreater(entry['response_bytes'], 0)
+
+    def test_streaming_body_queries_are_counted(self):
+        histogram.reset()
+        response = self.client.get(reverse('book-export'))
+        self.assertNotIn('book-export', histogram.snapshot())  # recorded once the body is done
+        body = b"".join(response.streaming_content)
+        entry = histogram.snapshot()['book-export']
+        self.assertGreater(entry['queries'], 0)  # the export query runs while the body streams
+        self.assertEqual(entry['response_bytes'], len(body))
+
+    def test_exceeding_the_budget_fails(self):
+        with patch.object(BookListView, 'request_budget', {'queries': 0}):
+            with self.assertRaises(BudgetExceeded):
+                self.client.get(reverse('book-list'))
+
+
+class BenchmarkHarnessTestCase(APITestCase):
+    """api/benchmark.py (the pieces `manage.py benchmark_api` runs inside a scratch database)"""
+
+    def test_seed_and_summarize(self):
+        seed_catalog(books=120, authors=3)
+        self.assertEqual(Book.objects.count(), 120)
+        self.assertEqual(Author.objects.count(), 3)
+
+        samples = run_endpoint(self.client, lambda i: ('GET', reverse('book-list') + '?page_size=10', {}),
+                               requests=5, warmup=1)
+        report = summarize(*samples)
+        self.assertEqual(report['requests'], 5)
+        self.assertEqual(report['statuses'], {'200': 5})
+        self.assertLessEqual(report['latency_ms']['p50'], report['latency_ms']['p99'])
+
+    def test_write_scenarios_succeed(self):
+        seed_catalog(books=60, authors=3)
+        command = BenchmarkCommand()
+        scenarios = command.scenarios(random.Random(0), bulk_size=5)
+        self.client.force_authenticate(User.objects.create_user('benchmark'))
+        # In scenario order, as the command runs them: deletes last.
+        for name in ['books-batch', 'books-export', *(name for name in scenarios if name in command.writes)]:
+            report = summarize(*run_endpoint(self.client, scenarios[name], requests=2, warmup=1))
+            self.assertTrue(all(code.startswith('2') for code in report['statuses']), (name, report['statuses']))
+        self.assertEqual(Book.objects.count(), 60)  # as many books created (1 + 5 per call) as deleted
+
+    def test_deletes_never_run_out(self):
+        seed_catalog(books=10, authors=2)
+        command = BenchmarkCommand()
+        scenarios = command.scenarios(random.Random(0), bulk_size=5)
+        # 4 bulk deletes of 5 need twice the catalog.
+        command.reserve_deletes(['books-bulk-delete'], {'requests': 3, 'warmup': 1, 'bulk_size': 5, 'seed': 0})
+        self.client.force_authenticate(User.objects.create_user('benchmark'))
+        report = summarize(*run_endpoint(self.client, scenarios['books-bulk-delete'], requests=3, warmup=1))
+        self.assertEqual(report['statuses'], {'200': 3})
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_failed_run_still_reports_finished_scenarios(self):
+        def run(command, options, results):
+            results['books-page'] = {'requests': 1}
+            raise CommandError("Ran out of books to delete; seed more with --books.")
+
+        out = StringIO()
+        with patch('api.management.commands.benchmark_api.scratch_database', lambda on_disk: nullcontext()), \
+                patch('api.management.commands.benchmark_api.seed_catalog'), \
+                patch.object(BenchmarkCommand, 'run', run):
+            with self.assertRaises(CommandError):
+                call_command('benchmark_api', stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['endpoints'], {'books-page': {'requests': 1}})
+        self.assertIn("Ran out of books", report['error'])
+
+    def test_scratch_database_restores_test_settings(self):
+        test_settings = dict(settings.DATABASES['default'].get('TEST', {}))
+        with patch('common.benchmark.setup_databases'), patch('common.benchmark.teardown_databases'), \
+                patch('common.benchmark.setup_test_environment'), patch('common.benchmark.teardown_test_environment'):
+            with scratch_database(on_disk=True):
+                self.assertTrue(settings.DATABASES['default']['TEST']['NAME'].endswith('benchmark.sqlite3'))
+        self.assertEqual(settings.DATABASES['default'].get('TEST', {}), test_settings)
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+
+class BookBatchTestCase(APITestCase):
+    """GET books/batch/?ids=..."""
+
+    def setUp(self):
+        get_cache().clear()
+        author = Author.objects.create(name="Batch Author")
+        self.books = [Book.objects.create(title=f"Batch {i}", publication_year=2001, author=author)
+                      for i in range(3)]
+
+    def test_results_follow_request_order_with_not_found_markers(self):
+        first, second, third = (book.pk for book in self.books)
+        ids = [third, 999999, first, third]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('book-batch'), {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['id'] for result in response.data['results']], ids)
+        self.assertEqual([result['status'] for result in response.data['results']],
+                         ['found', 'not_found', 'found', 'found'])
+        self.assertEqual(response.data['results'][2]['data']['title'], "Batch 0")
+        self.assertEqual((response.data['found'], response.data['missing']), (3, 1))
+        self.assertEqual(sum('"api_book"' in query['sql'] for query in context.captured_queries), 1)
+
+    def test_rejects_bad_or_too_many_ids(self):
+        self.assertEqual(self.client.get(reverse('book-batch')).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse('book-batch'), {'ids': '1,x'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        for ids in ('0', '-3', str(2 ** 63), str(10 ** 30)):
+            self.assertEqual(self.client.get(reverse('book-batch'), {'ids': ids}).status_code,
+                             status.HTTP_400_BAD_REQUEST, ids)
+        too_many = ','.join(str(i) for i in range(101))
+        self.assertEqual(self.client.get(reverse('book-batch'), {'ids': too_many}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsetsTestCase(APITestCase):
+    """?fields= / ?expand= on BookSerializer (common/fieldsets.py)"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name="Sparse Author")
+        for i in range(3):
+            Book.objects.create(title=f"Sparse {i}", publication_year=1990 + i, author=self.author)
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('book-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        book_queries = [q['sql'] for q in context.captured_queries
+                        if 'FROM "api_book"' in q['sql'] and 'COUNT(' not in q['sql']]
+        return response, book_queries
+
+    def test_fields_restrict_output_and_columns(self):
+        response, queries = self.get({'fields': 'id,title'})
+        self.assertEqual(list(response.data[0]), ['id', 'title'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"publication_year"', queries[0].split(' FROM ')[0])
+
+    def test_keyset_pages_keep_working_with_sparse_columns(self):
+        response, queries = self.get({'fields': 'publication_year', 'page_size': 2, 'ordering': 'title'})
+        self.assertEqual(list(response.data['results'][0]), ['publication_year'])
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(queries), 1)
+
+    def test_expand_author_uses_a_join(self):
+        response, queries = self.get({'fields': 'title,author', 'expand': 'author'})
+        self.assertEqual(response.data[0]['author'], {'id': self.author.pk, 'name': "Sparse Author"})
+        self.assertEqual(len(queries), 1)
+        self.assertIn('JOIN "api_author"', queries[0])
+
+    def test_nested_books_and_writes_are_not_shaped(self):
+        response = self.client.get(reverse('author-detail', args=[self.author.pk]), {'fields': 'name'})
+        self.assertEqual(set(response.data), {'id', 'name', 'books'})
+        self.assertEqual(set(response.data['books'][0]), {'id', 'title', 'publication_year', 'author'})
+
+
+class CompiledSerializerTestCase(APITestCase):
+    """api/compiled.py produces exactly what the DRF serializers do"""
+
+    def setUp(self):
+        seed_catalog(books=150, authors=4)
+        Author.objects.create(name="No Books Yet")
+
+    def test_book_output_is_identical(self):
+        queryset = Book.objects.order_by('title', 'id')
+        compiled = compile_serializer(BookSerializer)
+        expected = json.dumps(BookSerializer(queryset, many=True).data)
+        self.assertEqual(json.dumps(compiled.serialize(compiled.values(queryset))), expected)
+
+    def test_author_output_with_nested_books_is_identical(self):
+        queryset = Author.objects.order_by('name', 'id')
+        compiled = compile_serializer(AuthorSerializer)
+        expected = json.dumps(AuthorSerializer(queryset.prefetch_related('books'), many=True).data)
+        self.assertEqual(json.dumps(compiled.serialize(compiled.values(queryset))), expected)
+
+    def test_list_views_serve_identical_pages(self):
+        for url in (reverse('book-list') + '?page_size=40&ordering=-publication_year',
+                    reverse('book-list') + '?search=river&page_size=10',
+                    reverse('author-list')):
+            with patch.object(BookListView, 'compiled_reads', False), \
+                    patch.object(AuthorListView, 'compiled_reads', False):
+                expected = self.client.get(url).content
+            get_cache().clear()
+            self.assertEqual(self.client.get(url).content, expected, url)
+            get_cache().clear()
+
+
+class JSONRendererTestCase(APITestCase):
+    """common/renderers.py matches DRF's JSON output and parsing"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="pass1234")
+        self.author = Author.objects.create(name="Chinua Achebe")
+
+    def test_output_is_identical_to_drf(self):
+        data = {
+            'title': "Things Fall Apart \u2028\u2029 \u00e9", 'year': 1958, 'price': Decimal('9.50'),
+            'published': datetime(1958, 6, 1, 12, 30, tzinfo=dt_timezone.utc), 'tags': ('a', None), 1: True,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_floats_and_wide_integers_match_drf(self):
+        data = {'small': 1e-6, 'large': 1e20, 'plain': 0.1, 2.5: [2 ** 70, -2 ** 64, 1e-05]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(b"".join(iter_json_array([data, {'id': 1}], 1)), JSONRenderer().render([data, {'id': 1}]))
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):  # STRICT_JSON, as with DRF
+                FastJSONRenderer().render({'value': value})
+
+    def test_without_orjson_falls_back_to_drf(self):
+        data = {'title': "Arrow of God  ", 'year': 1964, 'price': Decimal('9.50')}
+        with patch('common.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+            self.assertEqual(b"".join(iter_json_array([data] * 3, 2)), JSONRenderer().render([data] * 3))
+            self.test_json_body_is_parsed()
+            self.test_invalid_json_is_a_parse_error()
+
+    def test_indent_falls_back_to_drf(self):
+        data = {'a': [1, 2]}
+        rendered = FastJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(rendered, JSONRenderer().render(data, 'application/json; indent=2'))
+
+    def test_streamed_array_matches_rendered_list(self):
+        items = [{'id': pk, 'title': f"Book {pk}"} for pk in range(25)]
+        for chunk_size in (1, 7, 25, 100):
+            self.assertEqual(b"".join(iter_json_array(items, chunk_size)), JSONRenderer().render(items))
+        self.assertEqual(b"".join(iter_json_array([])), b"[]")
+
+    def test_json_body_is_parsed(self):
+        self.client.force_authenticate(self.user)
+        payload = {"title": "Arrow of God", "publication_year": 1964, "author": self.author.pk}
+        response = self.client.post(reverse('book-create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['title'], "Arrow of God")
+
+    def test_invalid_json_is_a_parse_error(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('book-create'), b'{"title": "Arrow', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.data['detail'])
+
+
+class ResponseCompressionTestCase(APITestCase):
+    """common/compression.py negotiates encodings and reuses compressed cache entries"""
+
+    def setUp(self):
+        get_cache().clear()
+        seed_catalog(books=60, authors=3)
+        self.url = reverse('book-list') + '?page_size=50'
+
+    def test_gzip_body_decompresses_to_the_plain_response(self):
+        plain = self.client.get(self.url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate('gzip;q=0, deflate', ['gzip', 'deflate']), 'deflate')
+        self.assertEqual(negotiate('deflate;q=0.5, gzip;q=0.8', ['gzip', 'deflate']), 'gzip')
+        self.assertEqual(negotiate('*', ['br', 'gzip']), 'br')
+        self.assertEqual(negotiate('br', ['gzip', 'deflate']), None)
+        self.assertEqual(negotiate('', ['gzip']), None)
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, deflate')
+        self.assertEqual(response['Content-Encoding'], 'deflate')
+        self.assertEqual(json.loads(zlib.decompress(response.content))['results'][0]['id'], response.data['results'][0]['id'])
+
+    def test_small_and_streaming_responses_are_not_compressed(self):
+        small = self.client.get(reverse('book-list') + '?page_size=1', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', small)
+        self.assertIn('Accept-Encoding', small['Vary'])
+        export = self.client.get(reverse('book-export'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(export.streaming)
+        self.assertNotIn('Content-Encoding', export)
+
+    def test_cached_listing_is_compressed_once(self):
+        with patch('common.compression.gzip.compress', wraps=gzip.compress) as compress:
+            first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual((first['X-Compression-Cache'], second['X-Compression-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first.content, second.content)
+
+        # A committed write bumps the catalog version, so the next response is compressed afresh.
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title="Fresh", publication_year=2001, author=Author.objects.first())
+        third = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(third['X-Compression-Cache'], 'MISS')
+
+    def test_browsable_api_html_is_not_compressed(self):
+        # The page carries a CSRF token next to reflected input (BREACH) and the user's name.
+        self.client.force_authenticate(User.objects.create_user('reader'))
+        with patch('common.compression.gzip.compress', wraps=gzip.compress) as compress:
+            response = self.client.get(self.url, HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('X-Compression-Cache', response)
+        self.assertEqual(compress.call_count, 0)
@@ -0,0 +1,45 @@
+# api/testing.py
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryScalingAssertionsMixin:
+    """
+    TestCase mixin for catching N+1 query patterns.
+
+    `assertQueriesDoNotScale(grow, run)` calls `grow(n)` to add rows, then
+    `run()` (e.g. serialize a list or GET an endpoint) and counts the SQL
+    queries. It fails if the count changes between sizes, i.e. if the work
+    issues queries proportional to the result size.
+
+    Queries are counted on every database alias the test case declares in
+    `databases` (the router may send reads to the replica), or only on
+    `using` when an alias is given.
+    """
+
+    def assertQueriesDoNotScale(self, grow, run, sizes=(1, 5), using=None):
+        counts = []
+        for size in sizes:
+            grow(size)
+            counts.append(self._count_queries(run, using))
+        if len(set(counts)) > 1:
+            detail = ", ".join(f"{count} queries after +{size} rows"
+                               for size, count in zip(sizes, counts))
+            self.fail(f"Query count scales with result size ({detail}).")
+        return counts[0]
+
+    def _count_queries(self, run, using=None):
+        if using is not None:
+            aliases = [using]
+        elif self.databases == '__all__':
+            aliases = list(connections)
+        else:
+            aliases = [alias for alias in connections if alias in self.databases]
+        # A test mirror may share its connection object with the writer; count it once.
+        unique = {id(connections[alias]): connections[alias] for alias in aliases}
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(db)) for db in unique.values()]
+            run()
+        return sum(len(context.captured_queries) for context in contexts)
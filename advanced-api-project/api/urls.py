@@ -4,9 +4,15 @@ from django.urls import path
 from .views import (
     BookListView,
     BookDetailView,
+    BookBatchView,
     BookCreateView,
     BookUpdateView,
-    BookDeleteView
+    BookDeleteView,
+    BookBulkView,
+    BookExportView,
+    AuthorListView,
+    AuthorDetailView,
+    ConnectionStatsView,
 )
 
 urlpatterns = [
@@ -15,4 +21,10 @@ urlpatterns = [
     path('books/create/', BookCreateView.as_view(), name='book-create'),
     path('books/update/<int:pk>/', BookUpdateView.as_view(), name='book-update'),
     path('books/delete/<int:pk>/', BookDeleteView.as_view(), name='book-delete'),
+    path('books/export/', BookExportView.as_view(), name='book-export'),
+    path('books/bulk/', BookBulkView.as_view(), name='book-bulk'),
+    path('books/batch/', BookBatchView.as_view(), name='book-batch'),
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    path('authors/<int:pk>/', AuthorDetailView.as_view(), name='author-detail'),
+    path('stats/connections/', ConnectionStatsView.as_view(), name='connection-stats'),
 ]
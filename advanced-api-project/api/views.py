@@ -1,34 +1,74 @@
-from rest_framework import generics, filters
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import generics, filters, status
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters import rest_framework  
-from .models import Book
-from .serializers import BookSerializer
+
+from common.batch import BatchRetrieveAPIView
+from common.fieldsets import SparseFieldsetsViewMixin
+from common.pooling import stats as connection_stats
+from common.renderers import iter_json_array
+from .bulk import BulkBookWriter
+from .cache import CachedResponseMixin
+from .compiled import CompiledListMixin
+from .conditional import ConditionalGetMixin
+from .models import Author, Book
+from .pagination import KeysetPagination
+from .prefetch import PrefetchRelatedMixin
+from .search import FullTextSearchFilter
+from .serializers import AuthorSerializer, BookSerializer
 
 # List all books: read-only for unauthenticated, full access for authenticated
 # Features: filtering, searching, and ordering
-class BookListView(generics.ListAPIView):
+# Responses are cached per query string until the next Book/Author write (api/cache.py)
+# The ETag comes from MAX(updated_at) + COUNT over the filtered set (api/conditional.py)
+# ?fields= / ?expand=author shape both the JSON and the SQL (common/fieldsets.py)
+# Other pages are built from values_list() rows by the compiled serializer (api/compiled.py)
+class BookListView(SparseFieldsetsViewMixin, ConditionalGetMixin, CachedResponseMixin, CompiledListMixin,
+                   generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     # Enable filtering, search, and ordering
-    filter_backends = [rest_framework.DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Full-text search runs after ordering so relevance ranks first unless ?ordering= is given
+    filter_backends = [rest_framework.DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
 
     # Filtering by title, author name, and publication_year
     filterset_fields = ['title', 'author__name', 'publication_year']
 
-    # Search by title and author name
+    # Search by title and author name (FTS5 index, see api/search.py)
     search_fields = ['title', 'author__name']
 
     # Ordering by title and publication_year
     ordering_fields = ['title', 'publication_year']
     ordering = ['title']  # default ordering
 
-# Retrieve a single book
-class BookDetailView(generics.RetrieveAPIView):
+    # Keyset pagination (opt-in via ?page_size=); seeks on the ordering keys + id
+    pagination_class = KeysetPagination
+
+    # Fingerprint + page query, plus session auth (checked by common/instrumentation.py)
+    request_budget = {'queries': 4}
+
+# Retrieve a single book (cached and conditional like the list)
+class BookDetailView(SparseFieldsetsViewMixin, ConditionalGetMixin, CachedResponseMixin, generics.RetrieveAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    request_budget = {'queries': 4}
+
+# Fetch many books by id in one request: GET books/batch/?ids=3,1,9
+# One in_bulk() query; results in request order with not_found markers (common/batch.py)
+class BookBatchView(SparseFieldsetsViewMixin, BatchRetrieveAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = []
+    request_budget = {'queries': 3}
 
 # Create a book
 class BookCreateView(generics.CreateAPIView):
@@ -47,3 +87,116 @@ class BookDeleteView(generics.DestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
+
+# Stream the (filtered/searched/ordered) catalog as NDJSON (default), CSV (?output=csv)
+# or a single JSON array (?output=json)
+# Rows are read with iterator(chunk_size=...) and encoded as they arrive, so memory stays flat
+class BookExportView(BookListView):
+    pagination_class = None
+    chunk_size = 2000
+    export_fields = ['id', 'title', 'publication_year', 'author', 'author_name']
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in ('ndjson', 'csv', 'json'):
+            return Response({'detail': 'output must be "ndjson", "csv" or "json".'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .values_list('id', 'title', 'publication_year', 'author_id', 'author__name')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        if output == 'csv':
+            response = StreamingHttpResponse(self.stream_csv(rows), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="books.csv"'
+        elif output == 'json':
+            items = (dict(zip(self.export_fields, row)) for row in rows)
+            response = StreamingHttpResponse(iter_json_array(items), content_type='application/json')
+        else:
+            response = StreamingHttpResponse(self.stream_ndjson(rows), content_type='application/x-ndjson')
+        return response
+
+    def stream_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(self.export_fields, row)), ensure_ascii=False) + '\n'
+
+    def stream_csv(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.export_fields)
+        for row in rows:
+            yield writer.writerow(row)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+    def write(self, value):
+        return value
+
+# Bulk create (POST), update (PUT/PATCH) and delete (DELETE) books
+# Body is a JSON list (of book objects, or of ids for DELETE); see api/bulk.py
+# Responds 200 when every item succeeded, 207 with per-item errors otherwise
+class BookBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_items = 10000
+    batch_size = 500
+
+    def post(self, request):
+        return self.run(request, lambda writer, items: writer.create(items))
+
+    def put(self, request):
+        return self.run(request, lambda writer, items: writer.update(items))
+
+    def patch(self, request):
+        return self.run(request, lambda writer, items: writer.update(items, partial=True))
+
+    def delete(self, request):
+        return self.run(request, lambda writer, items: writer.delete(items))
+
+    def run(self, request, write):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of items.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({'detail': f'At most {self.max_items} items per request.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = write(BulkBookWriter(batch_size=self.batch_size), items)
+        failed = sum(1 for result in results if result['status'] == 'error')
+        return Response(
+            {'succeeded': len(results) - failed, 'failed': failed, 'results': results},
+            status=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_200_OK,
+        )
+
+# List all authors with their nested books
+# Related rows are prefetched from the serializer's nested fields (see api/prefetch.py),
+# or fetched per page by the compiled serializer (api/compiled.py)
+class AuthorListView(ConditionalGetMixin, PrefetchRelatedMixin, CompiledListMixin, generics.ListAPIView):
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    request_budget = {'queries': 6}
+
+    # The nested books are part of the representation, so they feed the ETag too
+    def get_fingerprint_querysets(self, queryset):
+        return [queryset, Book.objects.filter(author__in=queryset.values('pk'))]
+
+# Retrieve a single author with their nested books
+class AuthorDetailView(ConditionalGetMixin, PrefetchRelatedMixin, generics.RetrieveAPIView):
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    request_budget = {'queries': 6}
+    # Deleting one of the nested books doesn't move MAX(updated_at); revalidate on the ETag only
+    last_modified_header = False
+
+    def get_fingerprint_querysets(self, queryset):
+        return [queryset, Book.objects.filter(author__in=queryset.values('pk'))]
+
+
+# Persistent database connection usage (common/pooling.py): staff only
+class ConnectionStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(connection_stats.snapshot())
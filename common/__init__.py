@@ -0,0 +1 @@
+"""Helpers shared by advanced-api-project and social_media_api (put the repository root on sys.path)."""
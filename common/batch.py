@@ -0,0 +1,52 @@
+# common/batch.py
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+class BatchRetrieveAPIView(generics.GenericAPIView):
+    """
+    GET `?ids=3,1,9` returns many objects in one request.
+
+    How it works:
+    - Ids are resolved with a single `in_bulk()` query on the (filtered)
+      queryset and serialized in one pass.
+    - `results` follows the request order, duplicates included. Every item
+      is `{"id", "status": "found", "data"}` or `{"id", "status": "not_found"}`,
+      so a missing id never shifts the positions of the others.
+    - At most `max_batch_size` ids per request; `?ids=` may also be repeated.
+    """
+    ids_query_param = 'ids'
+    max_batch_size = 100
+
+    def get(self, request, *args, **kwargs):
+        ids = self.get_ids(request)
+        objects = self.filter_queryset(self.get_queryset()).in_bulk(set(ids))
+        found = [objects[pk] for pk in dict.fromkeys(ids) if pk in objects]
+        data = dict(zip((obj.pk for obj in found), self.get_serializer(found, many=True).data))
+
+        results = [
+            {'id': pk, 'status': 'found', 'data': data[pk]} if pk in data else {'id': pk, 'status': 'not_found'}
+            for pk in ids
+        ]
+        return Response({
+            'found': sum(1 for result in results if result['status'] == 'found'),
+            'missing': sum(1 for result in results if result['status'] == 'not_found'),
+            'results': results,
+        })
+
+    def get_ids(self, request):
+        raw = [part for value in request.query_params.getlist(self.ids_query_param)
+               for part in value.split(',') if part.strip()]
+        if not raw:
+            raise ValidationError({self.ids_query_param: ['This query parameter is required.']})
+        if len(raw) > self.max_batch_size:
+            raise ValidationError({self.ids_query_param: [f'At most {self.max_batch_size} ids per request.']})
+        try:
+            ids = [int(part) for part in raw]
+        except ValueError:
+            raise ValidationError({self.ids_query_param: ['Ids must be integers.']})
+        # Anything outside a positive 64-bit integer can't be a row id (and overflows SQLite).
+        if not all(0 < pk < 2 ** 63 for pk in ids):
+            raise ValidationError({self.ids_query_param: ['Ids must be positive 64-bit integers.']})
+        return ids
@@ -0,0 +1,136 @@
+# common/benchmark.py
+"""
+Load-test plumbing shared by both projects' `manage.py benchmark_api`.
+
+How it works:
+- `scratch_database()` creates the test databases (like `manage.py test`),
+  so seeding never touches the real database; the settings it changes are
+  restored on exit.
+- `run_endpoint()` drives one endpoint through the Django test client, timing
+  each request and counting its SQL queries with an execute_wrapper on every
+  alias. `summarize()` turns the samples into p50/p95/p99, req/s and
+  queries/request for the JSON report.
+- Seeding stays with each project (api/benchmark.py, accounts/benchmark.py).
+"""
+import math
+import platform
+import statistics
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+_MISSING = object()
+
+
+@contextmanager
+def scratch_database(on_disk=False):
+    """Fresh, migrated databases for the duration of the block."""
+    with ExitStack() as stack:
+        if on_disk:
+            # A real file so WAL, mmap and the page cache behave as in production.
+            tmp = stack.enter_context(tempfile.TemporaryDirectory())
+            test_settings = settings.DATABASES['default'].setdefault('TEST', {})
+            stack.callback(_restore, test_settings, 'NAME', test_settings.get('NAME', _MISSING))
+            test_settings['NAME'] = f"{tmp}/benchmark.sqlite3"
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+
+def _restore(mapping, key, value):
+    if value is _MISSING:
+        mapping.pop(key, None)
+    else:
+        mapping[key] = value
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_endpoint(client, make_request, requests, warmup=5, before_each=None, after_each=None):
+    """
+    Calls `make_request(i)` -> `(method, path, extra)` `requests` times and
+    returns the raw samples. `extra` goes to `client.generic()`;
+    `after_each(response)` lets a scenario chain requests (e.g. follow `next`).
+    """
+    for i in range(warmup):
+        method, path, extra = make_request(i)
+        response = client.generic(method, path, **extra)
+        if after_each is not None:
+            after_each(response)
+
+    latencies, queries, statuses = [], [], {}
+    started = time.perf_counter()
+    for i in range(requests):
+        method, path, extra = make_request(i)
+        if before_each is not None:
+            before_each()
+        counter = _QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            t0 = time.perf_counter()
+            response = client.generic(method, path, **extra)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latencies.append(time.perf_counter() - t0)
+        if after_each is not None:
+            after_each(response)
+        queries.append(counter.count)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return latencies, queries, statuses, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize(latencies, queries, statuses, elapsed):
+    ordered = sorted(latency * 1000 for latency in latencies)
+    return {
+        'requests': len(latencies),
+        'req_per_s': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(ordered, 50), 3),
+            'p95': round(percentile(ordered, 95), 3),
+            'p99': round(percentile(ordered, 99), 3),
+            'mean': round(statistics.fmean(ordered), 3),
+            'max': round(ordered[-1], 3),
+        },
+        'queries_per_request': {
+            'mean': round(statistics.fmean(queries), 2),
+            'max': max(queries),
+        },
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def environment():
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+    }
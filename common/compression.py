@@ -0,0 +1,180 @@
+# common/compression.py
+"""
+Response compression with content negotiation.
+
+How it works:
+- `CompressionMiddleware` picks an encoding from the request's
+  `Accept-Encoding` (q-values honoured, ties broken by the server's order
+  in RESPONSE_COMPRESSION['ENCODINGS']). gzip and deflate always work;
+  br and zstd are offered only when `brotli` / `zstandard` are importable.
+- Only complete (non-streaming) 200 JSON responses (application/json,
+  application/x-ndjson, application/*+json) at least MIN_SIZE bytes long
+  are compressed. HTML is left alone: the browsable API puts the CSRF
+  token next to reflected request input, which compression would expose
+  to BREACH. Responses that already have a Content-Encoding and
+  `Cache-Control: no-transform` are passed through untouched, as are
+  bodies that don't get smaller.
+- `Vary: Accept-Encoding` is added whenever the body could have been
+  compressed, and a strong ETag becomes weak (like Django's GZipMiddleware).
+- Views that cache their responses can set `compression_cache_key` (and
+  `compression_cache_timeout`) on the response; it must name a body that is
+  the same for every user. The compressed body is then stored in
+  RESPONSE_COMPRESSION['CACHE'] under that key + encoding + media type, so
+  a hot response is compressed once rather than on every request. The
+  entry remembers a checksum of its source body: a different body under the
+  same key replaces it instead of adding another, so each key holds at most
+  one variant per encoding and media type.
+"""
+import gzip
+import re
+import zlib
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+DEFAULTS = {
+    'MIN_SIZE': 1024,                              # bytes; smaller bodies aren't worth it
+    'ENCODINGS': ['br', 'zstd', 'gzip', 'deflate'],  # server preference
+    'LEVELS': {'br': 5, 'zstd': 3, 'gzip': 6, 'deflate': 6},
+    'CACHE': 'default',                            # where precompressed variants live
+}
+
+COMPRESSIBLE_TYPES = re.compile(r'^application/(json|x-ndjson|[\w.-]+\+json)\s*(;|$)')
+NO_TRANSFORM = re.compile(r'\bno-transform\b', re.IGNORECASE)
+
+
+def _gzip(data, level):
+    # mtime=0 keeps the output deterministic for identical bodies.
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _deflate(data, level):
+    # HTTP "deflate" is the zlib format (RFC 9110).
+    return zlib.compress(data, level)
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def _zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+COMPRESSORS = {'gzip': _gzip, 'deflate': _deflate}
+if brotli is not None:
+    COMPRESSORS['br'] = _brotli
+if zstandard is not None:
+    COMPRESSORS['zstd'] = _zstd
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+def available_encodings(config=None):
+    """Configured encodings whose compressor is available, in preference order."""
+    config = config or get_config()
+    return [encoding for encoding in config['ENCODINGS'] if encoding in COMPRESSORS]
+
+
+def negotiate(accept_encoding, encodings):
+    """Best of `encodings` for an Accept-Encoding header, or None for identity."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted['gzip' if name == 'x-gzip' else name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, config=None):
+    config = config or get_config()
+    return COMPRESSORS[encoding](data, config['LEVELS'][encoding])
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+
+        config = get_config()
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < config['MIN_SIZE']:
+            return response
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), available_encodings(config))
+        if encoding is None:
+            return response
+
+        body = self.compressed_body(response, encoding, config)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def is_compressible(self, response):
+        if response.streaming or response.status_code != 200 or response.has_header('Content-Encoding'):
+            return False
+        if NO_TRANSFORM.search(response.get('Cache-Control', '')):
+            return False
+        return bool(COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')))
+
+    def compressed_body(self, response, encoding, config):
+        key = getattr(response, 'compression_cache_key', None)
+        if key is None:
+            return compress(response.content, encoding, config)
+
+        # One slot per representation; the checksum tells whether it still
+        # holds these exact bytes.
+        content = response.content
+        media_type = getattr(response, 'accepted_media_type', None) or response.get('Content-Type', '')
+        cache = caches[config['CACHE']]
+        variant_key = f"{key}:{encoding}:{sha1(media_type.encode()).hexdigest()}"
+        checksum = (zlib.crc32(content), len(content))
+        cached = cache.get(variant_key)
+        if cached is not None and cached[0] == checksum:
+            response['X-Compression-Cache'] = 'HIT'
+            return cached[1]
+        response['X-Compression-Cache'] = 'MISS'
+        body = compress(content, encoding, config)
+        cache.set(variant_key, (checksum, body), getattr(response, 'compression_cache_timeout', DEFAULT_TIMEOUT))
+        return body
@@ -0,0 +1,111 @@
+# common/db.py
+"""
+SQLite production tuning and read/write routing.
+
+How it works:
+- `sqlite_databases()` builds the DATABASES setting: a `default` writer
+  alias and a `replica` reader alias on the same file. Every new connection
+  runs the configured PRAGMAs through Django's `init_command` option, so the
+  tuning is applied on connect without any signal handlers. Only
+  per-connection PRAGMAs belong there.
+- WAL is a property of the database file, so it is switched on once by a
+  migration (`enable_wal`) instead of on every connect, which would rewrite
+  the file whenever any management command opened it.
+- The writer uses `BEGIN IMMEDIATE` transactions: writers queue on the
+  write lock (up to `busy_timeout`) when the transaction starts instead of
+  failing with "database is locked" when a read lock can't be upgraded.
+- The reader connection is `query_only`; in WAL mode it reads the last
+  committed snapshot without waiting for writers.
+- Connections are persistent: kept for `conn_max_age` seconds (then
+  recycled) and health-checked before reuse. On a server-based engine pass
+  the same values; PostgreSQL can use Django's OPTIONS['pool'] instead.
+- `ReadWriteRouter` sends reads to the replica, writes to the writer, and
+  keeps reads on the writer while it is inside `atomic()` so a transaction
+  sees its own uncommitted rows (this also covers TestCase).
+"""
+from django.db import connections
+
+WRITER = 'default'
+READER = 'replica'
+
+DEFAULT_PRAGMAS = {
+    'synchronous': 'NORMAL',      # durable at checkpoints; safe with WAL (see enable_wal)
+    'busy_timeout': 5000,         # ms to wait for the write lock
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,         # negative = KiB, i.e. ~20 MB page cache per connection
+    'temp_store': 'MEMORY',
+}
+
+
+def pragma_statements(pragmas):
+    return [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+
+def sqlite_options(pragmas=None, read_only=False):
+    """OPTIONS for a sqlite3 DATABASES entry applying `pragmas` on connect."""
+    pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+    options = {}
+    if read_only:
+        pragmas['query_only'] = 'ON'
+    else:
+        options['transaction_mode'] = 'IMMEDIATE'
+    options['init_command'] = '; '.join(pragma_statements(pragmas))
+    return options
+
+
+def enable_wal(apps, schema_editor):
+    """
+    RunPython step for a non-atomic migration: switches the database file to
+    WAL. The mode is stored in the file, so this only has to run once.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode = WAL")
+
+
+def disable_wal(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode = DELETE")
+
+
+def sqlite_databases(name, pragmas=None, replica=True, conn_max_age=600, health_checks=True):
+    persistent = {'CONN_MAX_AGE': conn_max_age, 'CONN_HEALTH_CHECKS': health_checks}
+    databases = {
+        WRITER: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': name,
+            'OPTIONS': sqlite_options(pragmas),
+            **persistent,
+        },
+    }
+    if replica:
+        databases[READER] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': name,
+            'OPTIONS': sqlite_options(pragmas, read_only=True),
+            'TEST': {'MIRROR': WRITER},
+            **persistent,
+        }
+    return databases
+
+
+class ReadWriteRouter:
+    """DATABASE_ROUTERS entry for the aliases built by sqlite_databases()."""
+
+    def db_for_read(self, model, **hints):
+        if READER not in connections or connections[WRITER].in_atomic_block:
+            return WRITER
+        return READER
+
+    def db_for_write(self, model, **hints):
+        return WRITER
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == WRITER
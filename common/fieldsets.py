@@ -0,0 +1,117 @@
+# common/fieldsets.py
+"""
+Sparse fieldsets: `?fields=id,title` and `?expand=<relation>`.
+
+How it works:
+- `SparseFieldsetsMixin` (serializers) drops unrequested fields in
+  `get_fields()`, so their work, e.g. a SerializerMethodField, never runs.
+  Names listed in `expandable_fields` are swapped for a nested serializer
+  when named in `?expand=`. Only the top-level serializer of a safe
+  (read) request is shaped; nested serializers and writes are untouched.
+- `SparseFieldsetsViewMixin` (generic views) shapes the SQL to match: the
+  filtered queryset gets `.only()` with the requested columns plus the
+  primary key and ordering keys (so keyset cursors don't trigger deferred
+  loads), and expanded relations are fetched with `select_related()`.
+  Fields that aren't plain model columns declare their columns in
+  `field_requires`; if one doesn't, no `.only()` is applied.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignKey
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def requested_names(request, param):
+    """Set of comma-separated names from `?param=`, or None when absent."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetsMixin:
+    # name -> serializer class used for `?expand=name`
+    expandable_fields = {}
+    # name -> model columns a non-column field reads (e.g. method fields)
+    field_requires = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        request = self.context.get('request')
+        wanted = requested_names(request, FIELDS_PARAM)
+        if wanted is not None:
+            fields = {name: field for name, field in fields.items() if name in wanted}
+        for name in requested_names(request, EXPAND_PARAM) or ():
+            if name in fields and name in self.expandable_fields:
+                fields[name] = self.expandable_fields[name](read_only=True)
+        return fields
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class SparseFieldsetsViewMixin:
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        request = self.request
+        if requested_names(request, FIELDS_PARAM) is None and requested_names(request, EXPAND_PARAM) is None:
+            return queryset
+        serializer = self.get_serializer()
+        return shape_queryset(queryset, serializer)
+
+
+def shape_queryset(queryset, serializer):
+    """Applies select_related()/only() for the (already sparse) `serializer.fields`."""
+    model = queryset.model
+    columns = {model._meta.pk.name}
+    restrict = requested_names(serializer.context.get('request'), FIELDS_PARAM) is not None
+    related = []
+
+    for name, field in serializer.fields.items():
+        if name in serializer.field_requires:
+            columns.update(serializer.field_requires[name])
+            continue
+        model_field = _model_field(model, field.source)
+        if model_field is None:
+            restrict = False
+            continue
+        columns.add(model_field.name)
+        if isinstance(field, serializers.BaseSerializer) and isinstance(model_field, ForeignKey):
+            related.append(model_field.name)
+            target = model_field.related_model
+            columns.add(f"{model_field.name}__{target._meta.pk.name}")
+            for sub in field.fields.values():
+                sub_field = _model_field(target, sub.source)
+                if sub_field is None:
+                    restrict = False
+                else:
+                    columns.add(f"{model_field.name}__{sub_field.name}")
+
+    if related:
+        queryset = queryset.select_related(*related)
+    if restrict:
+        for key in queryset.query.order_by or model._meta.ordering:
+            if isinstance(key, str) and _model_field(model, key.lstrip('-')) is not None:
+                columns.add(key.lstrip('-'))
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+def _model_field(model, source):
+    if not source or '.' in source or source == '*':
+        return None
+    try:
+        field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    return field if field.concrete else None
@@ -0,0 +1,223 @@
+# common/instrumentation.py
+"""
+Per-request query count / latency instrumentation.
+
+How it works:
+- `RequestMetricsMiddleware` installs a `connection.execute_wrapper` on
+  every database alias for the duration of the request, counting queries
+  and summing their time. The wrappers live on the connection objects, so
+  a worker thread borrowing them (BoundedHashingPool.run_with_connections)
+  is counted too. A sync streaming body runs after the view returns: the
+  wrappers are re-installed around each chunk and the request is recorded
+  when the body is exhausted. Not counted: threads with their own
+  connections (e.g. thumbnail workers), async streaming bodies and
+  FileResponses handed to wsgi.file_wrapper.
+- Serializers that include `TimedSerializerMixin` add their
+  `to_representation` time (outermost call only, so nested serializers
+  aren't counted twice).
+- The figures go out as a `Server-Timing` header (visible in browser dev
+  tools; for a streaming response it covers up to the headers only) and
+  into an in-process histogram keyed by view.
+- DRF views can declare `request_budget = {'queries': 3, 'sql_ms': 50,
+  'total_ms': 200}`. Exceeding it logs a warning, or raises BudgetExceeded
+  when settings.REQUEST_BUDGET_ACTION is 'raise' (which fails the test that
+  made the request).
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class BudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.total_time = 0.0
+        self.response_size = None
+        self._serialize_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'sql_ms': self.sql_time * 1000,
+            'serialize_ms': self.serialize_time * 1000,
+            'total_ms': self.total_time * 1000,
+            'response_size': self.response_size,
+        }
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ])
+
+
+def current_metrics():
+    """The RequestMetrics of the request being handled, or None."""
+    return _current.get()
+
+
+@contextmanager
+def timed_serialization():
+    metrics = _current.get()
+    if metrics is None or metrics._serialize_depth:
+        yield
+        return
+    metrics._serialize_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_time += time.perf_counter() - started
+        metrics._serialize_depth -= 1
+
+
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class Histogram:
+    """Cumulative per-view latency buckets plus query/size totals (thread-safe)."""
+    bounds_ms = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, metrics):
+        index = bisect.bisect_left(self.bounds_ms, metrics.total_time * 1000)
+        with self._lock:
+            entry = self._views.get(view)
+            if entry is None:
+                entry = self._views[view] = {
+                    'count': 0, 'buckets': [0] * (len(self.bounds_ms) + 1),
+                    'total_ms': 0.0, 'sql_ms': 0.0, 'serialize_ms': 0.0,
+                    'queries': 0, 'max_queries': 0, 'response_bytes': 0,
+                }
+            entry['count'] += 1
+            entry['buckets'][index] += 1
+            entry['total_ms'] += metrics.total_time * 1000
+            entry['sql_ms'] += metrics.sql_time * 1000
+            entry['serialize_ms'] += metrics.serialize_time * 1000
+            entry['queries'] += metrics.queries
+            entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+            entry['response_bytes'] += metrics.response_size or 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: {**entry, 'buckets': dict(zip([*map(str, self.bounds_ms), '+Inf'], entry['buckets']))}
+                for view, entry in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+histogram = Histogram()
+
+
+class RequestMetricsMiddleware:
+    """Put first in MIDDLEWARE so `total` covers the whole stack."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        with collecting(metrics):
+            response = self.get_response(request)
+
+        metrics.total_time = time.perf_counter() - metrics.started
+        response['Server-Timing'] = metrics.server_timing()
+        if response.streaming and not response.is_async and getattr(response, 'file_to_stream', None) is None:
+            response.streaming_content = self.metered(response.streaming_content, metrics, request)
+            return response
+
+        if not response.streaming:
+            metrics.response_size = len(response.content)
+        record(request, metrics)
+        return response
+
+    def metered(self, content, metrics, request):
+        iterator = iter(content)
+        size = 0
+        try:
+            while True:
+                with collecting(metrics):
+                    chunk = next(iterator, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+        metrics.total_time = time.perf_counter() - metrics.started
+        metrics.response_size = size
+        record(request, metrics)
+
+
+@contextmanager
+def collecting(metrics):
+    """Counts queries on every alias into `metrics` and makes it current_metrics()."""
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield
+    finally:
+        _current.reset(token)
+
+
+def record(request, metrics):
+    match = request.resolver_match
+    if match is not None:
+        view_class = getattr(match.func, 'view_class', None)
+        histogram.record(match.view_name or match._func_path, metrics)
+        check_budget(view_class, metrics, request)
+
+
+def check_budget(view_class, metrics, request):
+    budget = getattr(view_class, 'request_budget', None)
+    if not budget:
+        return
+    actual = metrics.as_dict()
+    exceeded = {key: (actual[key], limit) for key, limit in budget.items() if actual[key] > limit}
+    if not exceeded:
+        return
+    detail = ", ".join(f"{key} {value:g} > {limit:g}" for key, (value, limit) in exceeded.items())
+    message = f"{view_class.__name__} {request.method} {request.path} over budget: {detail}"
+    if getattr(settings, 'REQUEST_BUDGET_ACTION', 'log') == 'raise':
+        raise BudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,108 @@
+# common/pooling.py
+"""
+Bookkeeping for Django's persistent connections.
+
+Django keeps one connection per thread (or ASGI task) and database alias.
+With CONN_MAX_AGE > 0 it is kept open across requests, closed once older
+than CONN_MAX_AGE (the max-lifetime recycle), and with CONN_HEALTH_CHECKS
+it is pinged before being reused in a new request. This module counts
+what that machinery does so it can be checked from the stats endpoint.
+
+How it works:
+- `connection_created` counts opens; an open on a wrapper that already had
+  a connection means the previous one was closed (max age, failed health
+  check, error, or CONN_MAX_AGE=0) and is counted as recycled.
+- On `request_started` a connection that is open and not past its
+  lifetime survives Django's close_old_connections and is counted as reused
+  (checked without side effects, since receiver order isn't guaranteed).
+- A connection is idle between requests and busy while one runs.
+"""
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+class ConnectionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wrappers = weakref.WeakSet()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.opened = 0
+            self.reused = 0
+            self.recycled = 0
+
+    def connection_opened(self, wrapper):
+        with self._lock:
+            self.opened += 1
+            if getattr(wrapper, '_stats_seen', False):
+                self.recycled += 1
+            wrapper._stats_seen = True
+            wrapper._stats_busy = True
+            self._wrappers.add(wrapper)
+
+    def request_started(self):
+        for wrapper in connections.all(initialized_only=True):
+            wrapper._stats_busy = True
+            if wrapper.connection is not None and not _is_obsolete(wrapper):
+                with self._lock:
+                    self.reused += 1
+
+    def request_finished(self):
+        for wrapper in connections.all(initialized_only=True):
+            wrapper._stats_busy = False
+
+    def snapshot(self):
+        aliases = {}
+        with self._lock:
+            wrappers = list(self._wrappers)
+            totals = {'opened': self.opened, 'reused': self.reused, 'recycled': self.recycled}
+        for wrapper in wrappers:
+            if wrapper.connection is None:
+                continue
+            entry = aliases.setdefault(wrapper.alias, {'open': 0, 'idle': 0})
+            entry['open'] += 1
+            if not getattr(wrapper, '_stats_busy', False):
+                entry['idle'] += 1
+
+        for alias, entry in aliases.items():
+            db = settings.DATABASES[alias]
+            entry['max_age'] = db.get('CONN_MAX_AGE', 0)
+            entry['health_checks'] = db.get('CONN_HEALTH_CHECKS', False)
+        return {
+            'open': sum(entry['open'] for entry in aliases.values()),
+            'idle': sum(entry['idle'] for entry in aliases.values()),
+            **totals,
+            'aliases': aliases,
+        }
+
+
+def _is_obsolete(wrapper):
+    return wrapper.errors_occurred or (wrapper.close_at is not None and time.monotonic() >= wrapper.close_at)
+
+
+stats = ConnectionStats()
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    stats.connection_opened(connection)
+
+
+def _on_request_started(sender, **kwargs):
+    stats.request_started()
+
+
+def _on_request_finished(sender, **kwargs):
+    stats.request_finished()
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='common.pooling.created')
+request_started.connect(_on_request_started, dispatch_uid='common.pooling.started')
+request_finished.connect(_on_request_finished, dispatch_uid='common.pooling.finished')
@@ -0,0 +1,133 @@
+# common/renderers.py
+"""
+JSON renderer/parser pair that uses orjson when it is installed.
+
+How it works:
+- `FastJSONRenderer` produces the same bytes as DRF's compact JSONRenderer
+  (UTF-8, no spaces, U+2028/U+2029 escaped) but encodes with orjson.
+  Values orjson doesn't know (Decimal, lazy translations, ...) and datetimes
+  (to keep DRF's format) go through DRF's JSONEncoder. Indented output
+  (`; indent=4` in Accept) and a missing orjson fall back to JSONRenderer.
+- orjson writes floats differently (1e-6 vs 1e-06, NaN/Infinity as null)
+  and refuses integers wider than 64 bits, so data holding a float, or that
+  orjson rejects, is encoded by the stdlib like DRF does (including its
+  STRICT_JSON handling of NaN). The float check is a C-level type scan;
+  on float-free pages of rows it costs about as much as orjson itself, so
+  rendering stays well ahead of the stdlib (see `benchmark_renderers`).
+- `FastJSONParser` decodes request bodies with orjson, falling back to
+  JSONParser.
+- `iter_json_array()` encodes a list lazily, a chunk of items at a time,
+  for StreamingHttpResponse bodies that never hold the whole document.
+
+Enable them in REST_FRAMEWORK's DEFAULT_RENDERER_CLASSES /
+DEFAULT_PARSER_CLASSES.
+"""
+import json
+from itertools import chain
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+_drf_encoder = JSONEncoder()
+_SCALARS = frozenset({str, int, bool, type(None)})
+_CONTAINERS = (dict, list, tuple)
+
+
+def _has_float(data):
+    """True if `data` holds a float anywhere, dict keys included."""
+    # Walks one nesting level at a time; type checks and flattening run in C,
+    # so a page of rows costs a few passes rather than a Python loop per value.
+    level = [data]
+    while level:
+        kinds = set(map(type, level))
+        if kinds <= _SCALARS:
+            return False
+        if any(issubclass(kind, float) for kind in kinds):
+            return True
+        nested = []
+        for kind in kinds:
+            if not issubclass(kind, _CONTAINERS):
+                continue
+            group = level if len(kinds) == 1 else [value for value in level if type(value) is kind]
+            if issubclass(kind, dict):
+                nested.extend(chain.from_iterable(map(dict.keys, group)))
+                nested.extend(chain.from_iterable(map(dict.values, group)))
+            else:
+                nested.extend(chain.from_iterable(group))
+        level = nested
+    return False
+
+
+def _default(obj):
+    value = _drf_encoder.default(obj)
+    if _has_float(value):
+        # e.g. Decimal -> float without COERCE_DECIMAL_TO_STRING: let the stdlib format it.
+        raise TypeError('float from JSONEncoder.default')
+    return value
+
+
+def _escape_separators(data):
+    # Same as DRF: keep the output valid inside JavaScript string literals.
+    if b'\xe2\x80\xa8' in data or b'\xe2\x80\xa9' in data:
+        data = data.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return data
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes, with orjson when available and byte-identical."""
+    if orjson is not None and not _has_float(data):
+        try:
+            return _escape_separators(orjson.dumps(
+                data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            ))
+        except TypeError:  # orjson.JSONEncodeError, e.g. an integer wider than 64 bits
+            pass
+    return _escape_separators(json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, allow_nan=not api_settings.STRICT_JSON, separators=(',', ':'),
+    ).encode('utf-8'))
+
+
+def iter_json_array(items, chunk_size=1000):
+    """Yields a JSON array of `items` in byte chunks of `chunk_size` items."""
+    yield b'['
+    first = True
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            # Encoding a list and stripping its brackets keeps the per-item
+            # overhead inside the encoder's fast path.
+            yield (b'' if first else b',') + dumps(chunk)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + dumps(chunk)[1:-1]
+    yield b']'
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # DRF's output is only reproduced for its compact, UNICODE_JSON defaults.
+        fallback = (orjson is None or data is None or not self.compact or self.ensure_ascii
+                    or self.get_indent(accepted_media_type or '', renderer_context or {}))
+        if fallback:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except (orjson.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
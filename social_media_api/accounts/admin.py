@@ -1,7 +1,3 @@
-from django.contrib import admin
-
-# Register your models here.
-
 # accounts/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
@@ -10,7 +6,7 @@ from .models import User
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     fieldsets = UserAdmin.fieldsets + (
-        ('Profile', {'fields': ('bio', 'profile_picture', 'followers')}),
+        ('Profile', {'fields': ('bio', 'profile_picture', 'followers', 'followers_count', 'following_count')}),
     )
+    readonly_fields = ('followers_count', 'following_count')
     filter_horizontal = ('groups', 'user_permissions', 'followers')
-
@@ -0,0 +1,180 @@
+# accounts/authentication.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+DEFAULTS = {
+    'LOCAL_MAXSIZE': 1024,   # tokens and user rows kept in this process (LRU)
+    'LOCAL_TTL': 30,         # seconds; bounds staleness across processes
+    'CACHE_ALIAS': 'default',  # shared Django cache tier, or None to disable
+    'SHARED_TTL': 300,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_local = None
+_local_lock = threading.Lock()
+
+
+def local_cache():
+    global _local
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                config = get_config()
+                _local = LRUCache(config['LOCAL_MAXSIZE'], config['LOCAL_TTL'])
+    return _local
+
+
+def shared_cache():
+    alias = get_config()['CACHE_ALIAS']
+    return caches[alias] if alias else None
+
+
+def cache_key(token_key):
+    # Never use the raw token as a cache key.
+    return 'auth:token:v2:' + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def user_cache_key(user_id):
+    return f'auth:user:v1:{user_id}'
+
+
+def cached_user_fields():
+    """User columns kept in the cache: not the password hash, not the F()-updated counters."""
+    User = get_user_model()
+    uncached = {'password', *getattr(User, 'COUNTER_FIELDS', ())}
+    return [field.attname for field in User._meta.concrete_fields if field.attname not in uncached]
+
+
+def _evict(key):
+    local_cache().delete(key)
+    shared = shared_cache()
+    if shared is not None:
+        shared.delete(key)
+
+
+def invalidate_token(token_key):
+    _evict(cache_key(token_key))
+
+
+def invalidate_user(user_id):
+    _evict(user_cache_key(user_id))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in for TokenAuthentication that answers warm requests without the
+    `Token.objects.select_related('user').get(key=...)` join.
+
+    How it works:
+    - Resolved tokens, as `(key, user id, created)`, and user rows are kept in
+      a per-process LRU with a short TTL, backed by an optional shared Django
+      cache tier. A warm request issues no query.
+    - The cached row leaves out the password hash and the follow counters,
+      which change through `F()` updates that send no signal. The user is
+      rebuilt with those fields deferred: reading a counter loads both from
+      the database, and saving the instance only writes loaded fields.
+    - accounts/signals.py drops a user's row whenever it is saved or deleted,
+      and evicts its tokens when they are deleted or rotated or when the
+      password or `is_active` changes. Other processes' local tiers catch up
+      within LOCAL_TTL.
+
+    Configure with the TOKEN_AUTH_CACHE setting (see DEFAULTS).
+    """
+
+    def authenticate_credentials(self, key):
+        ckey = cache_key(key)
+        cached = _cache_get(ckey)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            _cache_set(ckey, (token.key, token.user_id, token.created))
+            _cache_set(user_cache_key(user.pk), [user.__dict__[name] for name in cached_user_fields()])
+            return user, token
+
+        token_key, user_id, created = cached
+        user = self.load_user(user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return user, self.get_model()(key=token_key, user=user, created=created)
+
+    def load_user(self, user_id):
+        User = get_user_model()
+        fields = cached_user_fields()
+        ukey = user_cache_key(user_id)
+        values = _cache_get(ukey)
+        if values is None:
+            values = User._default_manager.filter(pk=user_id).values_list(*fields).first()
+            if values is None:
+                return None
+            _cache_set(ukey, list(values))
+        return User.from_db(router.db_for_read(User), fields, values)
+
+
+def _cache_get(key):
+    local = local_cache()
+    value = local.get(key)
+    if value is None:
+        shared = shared_cache()
+        value = shared.get(key) if shared is not None else None
+        if value is not None:
+            local.set(key, value)
+    return value
+
+
+def _cache_set(key, value):
+    shared = shared_cache()
+    if shared is not None:
+        shared.set(key, value, get_config()['SHARED_TTL'])
+    local_cache().set(key, value)
@@ -0,0 +1,75 @@
+# accounts/benchmark.py
+"""
+Network seeding for `manage.py benchmark_api` (timing, query counting and
+the report live in common/benchmark.py).
+
+How it works:
+- `seed_network()` bulk-inserts users sharing one password hash, a
+  power-law follow graph (a few accounts get most of the followers, as on a
+  real network), posts, and home timelines for the benchmark actors, then
+  reconciles the denormalized follow counters once.
+"""
+import itertools
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+Follow = User.followers.through
+
+PASSWORD = 'benchmark-password'
+
+
+def seed_network(users, follows_per_user=20, alpha=1.1, posts_per_user=2, actors=100,
+                 batch_size=10000, seed=0):
+    """
+    Returns the ids of `actors` users (spread across popularity ranks) that
+    have tokens and materialized timelines, for the authenticated endpoints.
+    """
+    from posts import timeline
+    from posts.models import Post
+
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    for start in range(0, users, batch_size):
+        User.objects.bulk_create(
+            User(username=f"user{i}", password=password)
+            for i in range(start, min(start + batch_size, users))
+        )
+    # Popularity rank == position in this list.
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+    # Zipf-like: the account at rank r is followed with weight 1 / (r + 1) ** alpha.
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** alpha for rank in range(len(user_ids))))
+    edges = []
+    for follower_id in user_ids:
+        k = rng.randint(1, 2 * follows_per_user - 1)
+        targets = set(rng.choices(user_ids, cum_weights=cum_weights, k=k))
+        targets.discard(follower_id)
+        # Forward edges are stored as (from_user=followed, to_user=follower).
+        edges += [Follow(from_user_id=target, to_user_id=follower_id) for target in targets]
+        if len(edges) >= batch_size:
+            Follow.objects.bulk_create(edges, ignore_conflicts=True)
+            edges = []
+    Follow.objects.bulk_create(edges, ignore_conflicts=True)
+    call_command('reconcile_follow_counts', stdout=StringIO())
+
+    posts = []
+    for author_id in user_ids:
+        posts += [Post(author_id=author_id, content=f"Post {n} by user {author_id}") for n in range(posts_per_user)]
+        if len(posts) >= batch_size:
+            Post.objects.bulk_create(posts)
+            posts = []
+    Post.objects.bulk_create(posts)
+
+    step = max(1, len(user_ids) // actors)
+    actor_ids = user_ids[::step][:actors]
+    Token.objects.bulk_create(Token(user_id=pk, key=Token.generate_key()) for pk in actor_ids)
+    for actor_id in actor_ids:
+        followed = Follow.objects.filter(to_user_id=actor_id).values_list('from_user_id', flat=True)
+        timeline.backfill(actor_id, list(followed))
+    return actor_ids
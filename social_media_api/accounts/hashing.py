@@ -0,0 +1,112 @@
+# accounts/hashing.py
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    'MAX_WORKERS': 4,    # concurrent PBKDF2 computations
+    'MAX_QUEUE': 16,     # calls allowed to wait for a worker
+    'TIMEOUT': 10,       # seconds a request waits for its result
+    'RETRY_AFTER': 1,    # seconds, sent with 503 responses
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING_POOL', {})}
+
+
+class HashingPoolBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many authentication requests in progress, please retry shortly.'
+    default_code = 'hashing_pool_busy'
+
+    def __init__(self, wait, detail=None):
+        self.wait = wait  # rendered as Retry-After by DRF's exception handler
+        super().__init__(detail)
+
+
+class BoundedHashingPool:
+    """
+    Runs password hashing/verification on a fixed-size thread pool.
+
+    At most `max_workers + max_queue` calls may be in flight; any call beyond
+    that is refused immediately with HashingPoolBusy (503 + Retry-After)
+    instead of queueing behind a login burst. `run()` is for pure hashing;
+    `run_with_connections()` also lends the caller's database connections, for
+    calls such as `authenticate()` that query around the hash.
+    """
+
+    def __init__(self, max_workers, max_queue, timeout, retry_after):
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolBusy(self.retry_after)
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingPoolBusy(self.retry_after)
+
+    def run_with_connections(self, func, *args, **kwargs):
+        """
+        Runs `func` on the pool using the calling thread's database connections,
+        so its queries join the caller's transaction and no per-worker
+        connections are opened. The caller is parked until `func` returns, so a
+        connection is never used by two threads at once: a call that times out
+        waiting for a worker is cancelled, one already running is waited for.
+        """
+        shared = {alias: connections[alias] for alias in connections}
+
+        def call():
+            for alias, connection in shared.items():
+                connection.inc_thread_sharing()
+                connections[alias] = connection
+            try:
+                return func(*args, **kwargs)
+            finally:
+                for alias, connection in shared.items():
+                    del connections[alias]
+                    connection.dec_thread_sharing()
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolBusy(self.retry_after)
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise HashingPoolBusy(self.retry_after)
+            return future.result()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = get_config()
+                _pool = BoundedHashingPool(config['MAX_WORKERS'], config['MAX_QUEUE'],
+                                           config['TIMEOUT'], config['RETRY_AFTER'])
+    return _pool
@@ -0,0 +1,136 @@
+# accounts/images.py
+"""
+Profile picture pipeline.
+
+- Uploads are streamed to storage chunk by chunk while a SHA-256 of the
+  content is computed; the file is stored as `profile_pictures/<sha256>.<ext>`,
+  so re-uploading the same image reuses the stored file.
+- Thumbnails are generated after the request, on a small in-process thread
+  pool (no broker), as `profile_pictures/thumbs/<sha256>_<size>.<fmt>`.
+- UserSerializer exposes the thumbnails that exist so far.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+DEFAULTS = {
+    'SIZES': (64, 128, 256),
+    'FORMAT': 'WEBP',   # falls back to JPEG when Pillow lacks WebP support
+    'QUALITY': 80,
+    'WORKERS': 2,
+}
+UPLOAD_DIR = 'profile_pictures'
+THUMB_DIR = f'{UPLOAD_DIR}/thumbs'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PROFILE_THUMBNAILS', {})}
+
+
+def thumbnail_format():
+    fmt = get_config()['FORMAT'].upper()
+    return 'JPEG' if fmt == 'WEBP' and not features.check('webp') else fmt
+
+
+def _extension(fmt):
+    return 'jpg' if fmt == 'JPEG' else fmt.lower()
+
+
+def content_hash(name):
+    """The hash part of a stored picture name, or None for legacy names."""
+    stem = os.path.splitext(os.path.basename(name or ''))[0]
+    return stem if len(stem) == 64 else None
+
+
+def thumbnail_name(digest, size):
+    return f'{THUMB_DIR}/{digest}_{size}.{_extension(thumbnail_format())}'
+
+
+def store_upload(upload):
+    """Stores an uploaded picture under its content hash and returns the storage name."""
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    ext = os.path.splitext(upload.name)[1].lower() or '.jpg'
+    name = f'{UPLOAD_DIR}/{digest.hexdigest()}{ext}'
+    if not default_storage.exists(name):
+        # Storage copies the upload chunk by chunk (large uploads are already
+        # spooled to a temporary file by Django's upload handlers).
+        upload.seek(0)
+        default_storage.save(name, upload)
+    return name
+
+
+def generate_thumbnails(name):
+    digest = content_hash(name)
+    if digest is None:
+        return
+    config = get_config()
+    fmt = thumbnail_format()
+    pending = [size for size in config['SIZES'] if not default_storage.exists(thumbnail_name(digest, size))]
+    if not pending:
+        return
+
+    with default_storage.open(name) as fh:
+        image = ImageOps.exif_transpose(Image.open(fh))
+        image.load()
+    if fmt == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB' if fmt == 'JPEG' else 'RGBA')
+
+    for size in sorted(pending, reverse=True):
+        thumb = image.copy()
+        thumb.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        thumb.save(buffer, format=fmt, quality=config['QUALITY'])
+        default_storage.save(thumbnail_name(digest, size), ContentFile(buffer.getvalue()))
+
+
+def thumbnail_urls(name):
+    """`{size: url}` for the thumbnails generated so far."""
+    digest = content_hash(name)
+    if digest is None:
+        return {}
+    urls = {}
+    for size in get_config()['SIZES']:
+        thumb = thumbnail_name(digest, size)
+        if default_storage.exists(thumb):
+            urls[str(size)] = default_storage.url(thumb)
+    return urls
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_futures = set()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=get_config()['WORKERS'],
+                                               thread_name_prefix='thumbnails')
+    return _executor
+
+
+def schedule_thumbnails(name):
+    """Queues thumbnail generation once the current transaction commits."""
+    def submit():
+        future = _get_executor().submit(generate_thumbnails, name)
+        _futures.add(future)
+        future.add_done_callback(_futures.discard)
+    transaction.on_commit(submit)
+
+
+def wait_for_thumbnails(timeout=None):
+    """Blocks until queued thumbnail jobs finish (used by tests and management code)."""
+    for future in list(_futures):
+        future.result(timeout=timeout)
@@ -0,0 +1,169 @@
+import itertools
+import json
+import random
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import tokens
+from accounts.authentication import local_cache
+from accounts.benchmark import PASSWORD, User, seed_network
+from common.benchmark import environment, run_endpoint, scratch_database, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a scratch database with a power-law follow graph and benchmarks "
+        "the accounts and posts APIs through the test client; prints p50/p95/p99 "
+        "latency, req/s and queries/request per endpoint as JSON. Scenarios "
+        "that change the follow graph run after those that read it. If a "
+        "scenario fails, the results of those that finished are still reported."
+    )
+
+    # Hash a password per request, so they run --login-requests times.
+    hashing = {'login', 'token-obtain', 'register'}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--follows-per-user', type=int, default=20, help="Mean out-degree.")
+        parser.add_argument('--alpha', type=float, default=1.1, help="Power-law exponent of follower counts.")
+        parser.add_argument('--posts-per-user', type=int, default=2)
+        parser.add_argument('--actors', type=int, default=100, help="Users the requests are made as.")
+        parser.add_argument('--requests', type=int, default=200, help="Timed requests per endpoint.")
+        parser.add_argument('--login-requests', type=int, default=20,
+                            help="Timed requests for login, token-obtain and register, which hash a password "
+                                 "per request.")
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--endpoints', nargs='*', help="Subset of endpoint names to run.")
+        parser.add_argument('--on-disk', action='store_true',
+                            help="Use a temporary database file instead of in-memory SQLite.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+
+    def handle(self, *args, **options):
+        report = {
+            'environment': environment(),
+            'config': {key: options[key] for key in (
+                'users', 'follows_per_user', 'alpha', 'posts_per_user', 'actors',
+                'requests', 'login_requests', 'on_disk', 'seed')},
+            'endpoints': {},
+        }
+        try:
+            with scratch_database(on_disk=options['on_disk']):
+                actor_ids = seed_network(
+                    options['users'], options['follows_per_user'], options['alpha'],
+                    options['posts_per_user'], options['actors'], seed=options['seed'],
+                )
+                self.run(options, actor_ids, report['endpoints'])
+        except Exception as exc:
+            if report['endpoints']:
+                # Keep what already finished; a long run shouldn't be lost to its last scenario.
+                report['error'] = str(exc)
+                self.write_report(report, options)
+            raise
+        self.write_report(report, options)
+
+    def write_report(self, report, options):
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def run(self, options, actor_ids, results):
+        """Runs the selected scenarios, adding each summary to `results` as it finishes."""
+        scenarios = self.scenarios(random.Random(options['seed']), actor_ids)
+        selected = options['endpoints'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}. "
+                               f"Choose from: {', '.join(scenarios)}")
+
+        client = APIClient()
+        for name in selected:
+            caches['default'].clear()
+            local_cache().clear()
+            requests = options['login_requests'] if name in self.hashing else options['requests']
+            samples = run_endpoint(client, scenarios[name], requests, warmup=min(options['warmup'], requests),
+                                   after_each=self.next_refresh if name == 'token-refresh' else None)
+            results[name] = summarize(*samples)
+            self.stderr.write(f"{name}: p50 {results[name]['latency_ms']['p50']} ms, "
+                              f"{results[name]['req_per_s']} req/s")
+        return results
+
+    def scenarios(self, rng, actor_ids):
+        """Each scenario maps a request index to (method, path, extra)."""
+        keys = dict(Token.objects.filter(user_id__in=actor_ids).values_list('user_id', 'key'))
+        popular_id = min(actor_ids)  # rank 0 has the most followers
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        first_id, last_id = user_ids.first(), user_ids.last()
+        # Register needs a new username on every call, warmup included.
+        registrations = itertools.count()
+        # Refresh tokens are single-use: each refresh sends the one the last response returned.
+        self.refresh = tokens.issue_tokens(User(pk=actor_ids[0]))['refresh']
+        self.pair = None
+
+        def auth(actor_id=None):
+            actor_id = actor_id or rng.choice(actor_ids)
+            return {'HTTP_AUTHORIZATION': f"Token {keys[actor_id]}"}
+
+        def body(method, path, payload, **extra):
+            return method, path, {'data': json.dumps(payload), 'content_type': 'application/json', **extra}
+
+        def address(n):
+            # A fresh client address per attempt keeps the per-IP throttles out of the numbers.
+            return f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}"
+
+        def login(url):
+            def make_request(i):
+                username = f"user{rng.randint(0, last_id - first_id)}"
+                return body('POST', url, {'username': username, 'password': PASSWORD}, REMOTE_ADDR=address(i))
+            return make_request
+
+        def register(i):
+            n = next(registrations)
+            return body('POST', reverse('register'), {
+                'username': f"bench{n}", 'email': f"bench{n}@example.com", 'password': PASSWORD,
+            }, REMOTE_ADDR=address(n))
+
+        def follow_unfollow(i):
+            # Even requests follow someone, odd ones undo it, so the graph keeps its shape.
+            if i % 2 == 0 or self.pair is None:
+                actor_id, target_id = rng.choice(actor_ids), rng.randint(first_id, last_id)
+                while target_id == actor_id:
+                    target_id = rng.randint(first_id, last_id)
+                self.pair = actor_id, target_id
+                return 'POST', reverse('follow', args=[target_id]), auth(actor_id)
+            actor_id, target_id = self.pair
+            self.pair = None
+            return 'POST', reverse('unfollow', args=[target_id]), auth(actor_id)
+
+        def random_ids(count):
+            return rng.sample(range(first_id, last_id + 1), min(count, last_id - first_id + 1))
+
+        return {
+            'login': login(reverse('login')),
+            'profile': lambda i: ('GET', reverse('profile'), auth()),
+            'feed': lambda i: ('GET', reverse('feed'), auth()),
+            'posts': lambda i: ('GET', reverse('post-list'), auth()),
+            'followers-popular': lambda i: ('GET', reverse('user-followers', args=[popular_id]), auth()),
+            'followers': lambda i: ('GET', reverse('user-followers', args=[rng.choice(actor_ids)]), auth()),
+            'following': lambda i: ('GET', reverse('user-following', args=[rng.choice(actor_ids)]), auth()),
+            'users-batch': lambda i: ('GET', f"{reverse('user-batch')}?ids={','.join(map(str, random_ids(50)))}",
+                                      auth()),
+            'token-obtain': login(reverse('token-obtain')),
+            'token-refresh': lambda i: body('POST', reverse('token-refresh'), {'refresh': self.refresh}),
+            'register': register,
+            'profile-update': lambda i: body('PATCH', reverse('profile'), {'bio': f"Benchmark bio {i}"}, **auth()),
+            'post-create': lambda i: body('POST', reverse('post-list'), {'content': f"Benchmark post {i}"}, **auth()),
+            'follow-unfollow': follow_unfollow,
+            'follow-bulk': lambda i: body('POST', reverse('follow-bulk'), {'user_ids': random_ids(50)}, **auth()),
+        }
+
+    def next_refresh(self, response):
+        self.refresh = response.json()['refresh']
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from accounts.models import User
+
+Follow = User.followers.through
+
+
+def _edge_count(column):
+    counts = (Follow.objects.filter(**{column: OuterRef('pk')})
+              .values(column).annotate(n=Count('pk')).values('n'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = "Recomputes User.followers_count / following_count from the follow edge table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many users have drifted counters.")
+
+    def handle(self, *args, **options):
+        # Forward edges are stored as (from_user=followed, to_user=follower).
+        followers = _edge_count('from_user')
+        following = _edge_count('to_user')
+
+        drifted = (User.objects.annotate(actual_followers=followers, actual_following=following)
+                   .filter(~Q(followers_count=F('actual_followers')) |
+                           ~Q(following_count=F('actual_following')))
+                   .count())
+        if options['dry_run']:
+            self.stdout.write(f"{drifted} user(s) have drifted follow counters.")
+            return
+
+        with transaction.atomic():
+            # One set-based UPDATE for the whole table.
+            User.objects.update(followers_count=followers, following_count=following)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled follow counters ({drifted} user(s) corrected)."))
@@ -1,8 +1,4 @@
-<<<<<<< HEAD
-# Generated by Django 5.2.4 on 2025-08-22 12:23
-=======
 # Generated by Django 5.2.4 on 2025-08-23 11:01
->>>>>>> 4e9ddf5 (Task 0: Django project setup, custom User, DRF token auth, register/login/profile endpoints)
 
 import django.contrib.auth.models
 import django.contrib.auth.validators
@@ -35,11 +31,7 @@ class Migration(migrations.Migration):
                 ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
                 ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
                 ('bio', models.TextField(blank=True)),
-<<<<<<< HEAD
-                ('profile_picture', models.ImageField(blank=True, null=True, upload_to='profiles/')),
-=======
                 ('profile_picture', models.ImageField(blank=True, null=True, upload_to='profile_pictures/')),
->>>>>>> 4e9ddf5 (Task 0: Django project setup, custom User, DRF token auth, register/login/profile endpoints)
                 ('followers', models.ManyToManyField(blank=True, related_name='following', to=settings.AUTH_USER_MODEL)),
                 ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
                 ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counts(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Follow = User.followers.through
+
+    def edge_count(column):
+        counts = (Follow.objects.filter(**{column: OuterRef('pk')})
+                  .values(column).annotate(n=Count('pk')).values('n'))
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    User.objects.update(followers_count=edge_count('from_user'), following_count=edge_count('to_user'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
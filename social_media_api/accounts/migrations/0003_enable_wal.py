@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from common.db import disable_wal, enable_wal
+
+
+class Migration(migrations.Migration):
+    # PRAGMA journal_mode can't be changed inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0002_user_follow_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, disable_wal),
+    ]
@@ -1,7 +1,3 @@
-from django.db import models
-
-# Create your models here.
-
 # accounts/models.py
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -9,9 +5,6 @@ from django.db import models
 class User(AbstractUser):
     bio = models.TextField(blank=True)
 
-    profile_picture = models.ImageField(upload_to='profiles/', null=True, blank=True)
-    followers = models.ManyToManyField('self', symmetrical=False, related_name='following', blank=True)
-
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
     followers = models.ManyToManyField(
         'self',
@@ -20,5 +13,27 @@ class User(AbstractUser):
         blank=True
     )
 
+    # Denormalized sizes of `followers` / `following`, kept exact by the
+    # m2m_changed/pre_delete receivers in accounts/signals.py.
+    # `manage.py reconcile_follow_counts` recomputes them from the edge table.
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Changed by F() updates that send no signal, so never served from a cache.
+    COUNTER_FIELDS = ('followers_count', 'following_count')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # What was loaded, so accounts/signals.py can tell whether a save changed credentials.
+        user._loaded_credentials = (user.__dict__.get('password'), user.__dict__.get('is_active'))
+        return user
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # A deferred counter (see accounts/authentication.py) is loaded together with its sibling.
+        if fields is not None and set(fields) <= set(self.COUNTER_FIELDS):
+            fields = [name for name in self.COUNTER_FIELDS if name in fields or name in self.get_deferred_fields()]
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
     def __str__(self):
         return self.username
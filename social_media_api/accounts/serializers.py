@@ -1,67 +1,105 @@
-
+# accounts/serializers.py
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
-from django.contrib.auth import get_user_model, authenticate
 
-from django.contrib.auth import get_user_model
-from rest_framework import serializers
+from common.fieldsets import SparseFieldsetsMixin
+from common.instrumentation import TimedSerializerMixin
+from . import images
+from .hashing import get_pool
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetsMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    # followers_count / following_count are stored on the row (see accounts/signals.py)
+    # profile_picture goes through accounts/images.py (content-hash names, async thumbnails)
+    # Reads accept ?fields= (common/fieldsets.py); unrequested thumbnails aren't computed
+    thumbnails = serializers.SerializerMethodField()
+    field_requires = {'thumbnails': ['profile_picture']}
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'bio', 'profile_picture']
+        fields = (
+            'id', 'username', 'email', 'first_name', 'last_name',
+            'bio', 'profile_picture', 'thumbnails', 'followers_count', 'following_count'
+        )
+        read_only_fields = ('followers_count', 'following_count')
+
+    def get_thumbnails(self, obj):
+        urls = images.thumbnail_urls(obj.profile_picture.name)
+        request = self.context.get('request')
+        if request is not None:
+            urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+        return urls
+
+    def update(self, instance, validated_data):
+        upload = validated_data.pop('profile_picture', serializers.empty)
+        if upload is not serializers.empty:
+            if upload:
+                instance.profile_picture.name = images.store_upload(upload)
+                images.schedule_thumbnails(instance.profile_picture.name)
+            else:
+                instance.profile_picture = None
+            validated_data['profile_picture'] = instance.profile_picture
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Write only the submitted columns: the follow counters are kept by F()
+        # updates (accounts/signals.py) that this instance may not have seen.
+        instance.save(update_fields=list(validated_data))
+        return instance
 
 class RegisterSerializer(serializers.ModelSerializer):
-    password = serializers.CharField(write_only=True)
+    password = serializers.CharField(write_only=True, min_length=8)
+
     class Meta:
         model = User
-        fields = ['username', 'email', 'password']
+        fields = ('username', 'email', 'password', 'first_name', 'last_name', 'bio')
+
     def create(self, validated_data):
-        return User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data.get('email'),
-            password=validated_data['password']
-        )
+        password = validated_data.pop('password')
+        user = User(**validated_data)
+        # Hash on the bounded pool (accounts/hashing.py); may raise 503.
+        user.password = get_pool().run(make_password, password)
+        user.save()
+        return user
 
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
+
     def validate(self, attrs):
-        user = authenticate(username=attrs['username'], password=attrs['password'])
-        if not user:
+        # The whole authenticate() call (AUTHENTICATION_BACKENDS, is_active checks,
+        # user_login_failed, hash upgrades) runs on the bounded pool, with this
+        # request's database connections (accounts/hashing.py).
+        user = get_pool().run_with_connections(
+            authenticate, self.context.get('request'),
+            username=attrs['username'], password=attrs['password'],
+        )
+        if user is None:
             raise serializers.ValidationError('Invalid credentials')
         attrs['user'] = user
         return attrs
 
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
+class PublicUserSerializer(SparseFieldsetsMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    """User card for follower/following listings (no email)."""
 
     class Meta:
         model = User
-        fields = (
-            'id', 'username', 'email', 'first_name', 'last_name',
-            'bio', 'profile_picture', 'followers_count', 'following_count'
-        )
-        read_only_fields = ('followers_count', 'following_count')
+        fields = ('id', 'username', 'first_name', 'last_name', 'bio',
+                  'profile_picture', 'followers_count', 'following_count')
+        read_only_fields = fields
 
-    def get_followers_count(self, obj):
-        return obj.followers.count()
+class FollowerEdgeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Edge (from_user=followed, to_user=follower): the follower is `to_user`
+    user = PublicUserSerializer(source='to_user', read_only=True)
 
-    def get_following_count(self, obj):
-        return obj.following.count()
+    class Meta:
+        model = User.followers.through
+        fields = ('user',)
 
-class RegisterSerializer(serializers.ModelSerializer):
-    password = serializers.CharField(write_only=True, min_length=8)
+class FollowingEdgeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    user = PublicUserSerializer(source='from_user', read_only=True)
 
     class Meta:
-        model = User
-        fields = ('username', 'email', 'password', 'first_name', 'last_name', 'bio')
-
-    def create(self, validated_data):
-        password = validated_data.pop('password')
-        user = User(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        model = User.followers.through
+        fields = ('user',)
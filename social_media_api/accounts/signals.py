@@ -0,0 +1,103 @@
+# accounts/signals.py
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import tokens
+from .authentication import invalidate_token, invalidate_user
+from .models import User
+
+Follow = User.followers.through
+
+
+def adjust_follow_counts(instance, reverse, pks, delta):
+    """
+    Applies `delta` for every (followed, follower) edge between `instance`
+    and `pks` with two atomic `F()` UPDATEs.
+
+    Forward (`a.followers.add(b)`): `instance` is followed by each pk.
+    Reverse (`b.following.add(a)`): `instance` follows each pk.
+    """
+    pks = list(pks)
+    if not pks:
+        return
+    if reverse:
+        followed_ids, follower_ids = pks, [instance.pk]
+    else:
+        followed_ids, follower_ids = [instance.pk], pks
+    User.objects.filter(pk__in=followed_ids).update(
+        followers_count=F('followers_count') + delta * len(follower_ids))
+    User.objects.filter(pk__in=follower_ids).update(
+        following_count=F('following_count') + delta * len(followed_ids))
+
+
+def _existing_edges(instance, reverse, pk_set=None):
+    # Forward edges are stored as (from_user=followed, to_user=follower).
+    own, other = ('to_user_id', 'from_user_id') if reverse else ('from_user_id', 'to_user_id')
+    edges = Follow.objects.filter(**{own: instance.pk})
+    if pk_set is not None:
+        edges = edges.filter(**{f'{other}__in': pk_set})
+    return set(edges.values_list(other, flat=True))
+
+
+@receiver(m2m_changed, sender=Follow)
+def update_follow_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    # post_add only receives ids that were actually inserted. For removals and
+    # clears, Django passes the requested ids, so capture the real edges first.
+    if action == 'post_add':
+        adjust_follow_counts(instance, reverse, pk_set, +1)
+    elif action == 'pre_remove':
+        instance._follow_edges_removed = _existing_edges(instance, reverse, pk_set)
+    elif action == 'pre_clear':
+        instance._follow_edges_removed = _existing_edges(instance, reverse)
+    elif action in ('post_remove', 'post_clear'):
+        adjust_follow_counts(instance, reverse, instance.__dict__.pop('_follow_edges_removed', ()), -1)
+
+
+@receiver(pre_delete, sender=User)
+def release_follow_counts(sender, instance, **kwargs):
+    # Deleting a user cascades its edges without m2m_changed.
+    adjust_follow_counts(instance, False, _existing_edges(instance, False), -1)
+    adjust_follow_counts(instance, True, _existing_edges(instance, True), -1)
+
+
+# Token auth cache (accounts/authentication.py): evict a token when it is
+# deleted or rotated, a user's row on any save/delete, and the user's tokens
+# only when the password or is_active changed (the only saves that need the
+# Token query).
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def evict_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    tokens.revoke_user(instance.pk)
+
+
+def _credentials_changed(instance, update_fields):
+    if update_fields is not None:
+        return not {'password', 'is_active'}.isdisjoint(update_fields)
+    loaded = instance.__dict__.get('_loaded_credentials')
+    # Not loaded through from_db (e.g. constructed by hand): assume it did.
+    return loaded is None or loaded != (instance.__dict__.get('password'), instance.__dict__.get('is_active'))
+
+
+@receiver(post_save, sender=User)
+def evict_user_tokens(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if created or raw or not _credentials_changed(instance, update_fields):
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        invalidate_token(key)
+    if not instance.is_active:
+        tokens.revoke_user(instance.pk)  # signed tokens (accounts/tokens.py)
+    instance._loaded_credentials = (instance.__dict__.get('password'), instance.__dict__.get('is_active'))
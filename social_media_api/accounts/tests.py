@@ -1,3 +1,703 @@
-from django.test import TestCase
+import gzip
+import random
+import tempfile
+import zlib
+from hashlib import sha1
+from io import BytesIO, StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from common.benchmark import run_endpoint, summarize
+from common.compression import CompressionMiddleware
+from common.instrumentation import BudgetExceeded, histogram
+from common.renderers import FastJSONRenderer, iter_json_array
+from .authentication import CachedTokenAuthentication, LRUCache, cache_key, local_cache
+from .benchmark import seed_network
+from .management.commands.benchmark_api import Command as BenchmarkCommand
+from .hashing import BoundedHashingPool
+from .images import content_hash, thumbnail_name, wait_for_thumbnails
+from . import tokens
+from .tokens import SignedTokenAuthentication
+from .views import LoginView, ProfileView
+
+from .serializers import UserSerializer
+
+User = get_user_model()
+
+
+class FollowCountersTestCase(TestCase):
+    """Denormalized followers_count / following_count"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='password123')
+        self.bob = User.objects.create_user(username='bob', password='password123')
+        self.carol = User.objects.create_user(username='carol', password='password123')
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def test_add_remove_and_clear(self):
+        self.alice.followers.add(self.bob, self.carol)
+        self.alice.followers.add(self.bob)  # already following: no double count
+        self.assertEqual(self.counts(self.alice), (2, 0))
+        self.assertEqual(self.counts(self.bob), (0, 1))
+
+        self.alice.followers.remove(self.bob, self.bob)
+        self.alice.followers.remove(self.bob)  # not following any more: no-op
+        self.assertEqual(self.counts(self.alice), (1, 0))
+        self.assertEqual(self.counts(self.bob), (0, 0))
+
+        self.alice.followers.clear()
+        self.assertEqual(self.counts(self.alice), (0, 0))
+        self.assertEqual(self.counts(self.carol), (0, 0))
+
+    def test_reverse_side_and_user_delete(self):
+        self.carol.following.add(self.alice, self.bob)
+        self.assertEqual(self.counts(self.carol), (0, 2))
+        self.assertEqual(self.counts(self.alice), (1, 0))
+
+        self.carol.delete()
+        self.assertEqual(self.counts(self.alice), (0, 0))
+        self.assertEqual(self.counts(self.bob), (0, 0))
+
+    def test_serializer_reads_stored_counts(self):
+        self.alice.followers.add(self.bob)
+        self.alice.refresh_from_db()
+        with self.assertNumQueries(0):
+            data = UserSerializer(self.alice).data
+        self.assertEqual(data['followers_count'], 1)
+
+    def test_reconcile_command(self):
+        self.alice.followers.add(self.bob)
+        User.objects.update(followers_count=7, following_count=7)
+        out = StringIO()
+        call_command('reconcile_follow_counts', stdout=out)
+        self.assertIn('3 user(s) corrected', out.getvalue())
+        self.assertEqual(self.counts(self.alice), (1, 0))
+        self.assertEqual(self.counts(self.bob), (0, 1))
+        self.assertEqual(self.counts(self.carol), (0, 0))
+
+
+class FollowAPITestCase(APITestCase):
+    """Follow/unfollow, bulk follow and follower listings"""
+
+    def setUp(self):
+        self.me = User.objects.create_user(username='me', password='password123')
+        self.others = [User.objects.create_user(username=f'user{i}', password='password123') for i in range(5)]
+        self.client.force_authenticate(self.me)
+
+    def test_follow_and_unfollow(self):
+        target = self.others[0]
+        response = self.client.post(reverse('follow', args=[target.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(target.followers.filter(pk=self.me.pk).exists())
+
+        self.client.post(reverse('unfollow', args=[target.id]))
+        target.refresh_from_db()
+        self.assertEqual(target.followers_count, 0)
+
+    def test_cannot_follow_self_or_missing_user(self):
+        self.assertEqual(self.client.post(reverse('follow', args=[self.me.id])).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(reverse('follow', args=[424242])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_follow(self):
+        self.others[0].followers.add(self.me)
+        ids = [u.id for u in self.others] + [self.me.id, 424242]
+        response = self.client.post(reverse('follow-bulk'), {'user_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['already_following'], [self.others[0].id])
+        self.assertEqual(response.data['not_found'], [424242])
+        self.assertEqual(len(response.data['followed']), 4)
+
+        self.me.refresh_from_db()
+        self.assertEqual(self.me.following_count, 5)
+        self.others[3].refresh_from_db()
+        self.assertEqual(self.others[3].followers_count, 1)
+
+    def test_bulk_follow_reads_edges_after_the_follower_lock(self):
+        target = self.others[1]
+
+        def concurrent_follow(user):
+            # Another request followed `target` and committed while we waited for the lock.
+            target.followers.add(user)
+
+        with patch('accounts.views.lock_follower', side_effect=concurrent_follow):
+            response = self.client.post(reverse('follow-bulk'), {'user_ids': [target.id]}, format='json')
+        self.assertEqual(response.data['already_following'], [target.id])
+        target.refresh_from_db()
+        self.me.refresh_from_db()
+        self.assertEqual((target.followers_count, self.me.following_count), (1, 1))
+
+    def test_follower_listing_is_keyset_paginated(self):
+        star = self.others[0]
+        star.followers.add(self.me, *self.others[1:])
+        url = reverse('user-followers', args=[star.id]) + '?page_size=2'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [edge['user']['username'] for edge in response.data['results']]
+            url = response.data['next']
+        # Newest follower first
+        self.assertEqual(seen, ['user4', 'user3', 'user2', 'user1', 'me'])
+
+        response = self.client.get(reverse('user-following', args=[self.me.id]))
+        self.assertEqual([edge['user']['id'] for edge in response.data['results']], [star.id])
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+    """Token -> user cache in front of TokenAuthentication"""
+
+    def setUp(self):
+        cache.clear()
+        local_cache().clear()
+        self.user = User.objects.create_user(username='cached', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_lookup(self):
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('authtoken_token' in q['sql'] for q in queries))
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(reverse('profile'))
+        self.token.delete()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(reverse('profile'))
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_reflects_counter_updates_and_writes_keep_them(self):
+        self.client.get(reverse('profile'))  # token (and formerly the user row) now cached
+        fan = User.objects.create_user(username='fan', password='password123')
+        self.user.followers.add(fan)  # F() update, no post_save for self.user
+        self.assertEqual(self.client.get(reverse('profile')).data['followers_count'], 1)
+
+        response = self.client.patch(reverse('profile'), {'bio': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.bio, self.user.followers_count), ('x', 1))
+
+    def test_warm_lookup_runs_no_query(self):
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(self.token.key)
+        with CaptureQueriesContext(connection) as cached:
+            user, _ = auth.authenticate_credentials(self.token.key)
+        with CaptureQueriesContext(connection) as uncached:
+            TokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual((len(cached), len(uncached)), (0, 1))
+
+        # The counters are never cached; both come back in one query.
+        with self.assertNumQueries(1):
+            self.assertEqual((user.followers_count, user.following_count), (0, 0))
+
+    def test_only_credential_changes_evict_tokens(self):
+        CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        user = User.objects.get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            user.bio = 'x'
+            user.save()
+            user.save(update_fields=['bio'])
+        self.assertFalse(any('authtoken_token' in q['sql'] for q in queries))
+        self.assertIsNotNone(local_cache().get(cache_key(self.token.key)))
+
+        user.set_password('another-pass-9')
+        user.save()
+        self.assertIsNone(local_cache().get(cache_key(self.token.key)))
+
+    def test_lru_is_bounded_and_expires(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        for key in 'abc':
+            cache.set(key, key)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 2)
+        cache.ttl = -1
+        cache.set('d', 'd')
+        self.assertIsNone(cache.get('d'))
+
+
+class PasswordHashingTestCase(APITestCase):
+    """Register/login hashing pool, back-pressure and throttling"""
+
+    def setUp(self):
+        cache.clear()  # throttle history
+        self.user = User.objects.create_user(username='hasher', password='password123')
+
+    def test_register_and_login(self):
+        response = self.client.post(reverse('register'), {
+            'username': 'newbie', 'email': 'newbie@example.com', 'password': 'correct-horse-9',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(User.objects.get(username='newbie').check_password('correct-horse-9'))
+
+        response = self.client.post(reverse('login'), {'username': 'hasher', 'password': 'password123'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token', response.data)
+
+        response = self.client.post(reverse('login'), {'username': 'hasher', 'password': 'nope'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_saturated_pool_returns_503(self):
+        pool = BoundedHashingPool(max_workers=1, max_queue=0, timeout=5, retry_after=3)
+        pool._slots.acquire()  # the only slot is busy
+        with patch('accounts.serializers.get_pool', return_value=pool):
+            response = self.client.post(reverse('login'), {'username': 'hasher', 'password': 'password123'},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '3')
+
+    def test_login_goes_through_authenticate(self):
+        failures = []
+        handler = lambda sender, credentials, **kwargs: failures.append(credentials['username'])
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+        response = self.client.post(reverse('login'), {'username': 'hasher', 'password': 'nope'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(failures, ['hasher'])
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(reverse('login'), {'username': 'hasher', 'password': 'password123'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_upgrades_outdated_hash(self):
+        with self.settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            self.user.set_password('password123')
+            self.user.save()
+        self.assertTrue(self.user.password.startswith('md5$'))
+        hashers = ['django.contrib.auth.hashers.PBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher']
+        with self.settings(PASSWORD_HASHERS=hashers):
+            response = self.client.post(reverse('login'), {'username': 'hasher', 'password': 'password123'},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+
+    def test_login_with_a_list_body(self):
+        response = self.client.post(reverse('login'), [{'username': 'hasher'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_ip_throttle_spans_usernames(self):
+        with patch('accounts.throttles.LoginIPThrottle.THROTTLE_RATES', {'login_ip': '3/minute'}):
+            codes = [self.client.post(reverse('login'), {'username': f'guess{i}', 'password': 'x'},
+                                      format='json').status_code for i in range(4)]
+        self.assertEqual(codes, [400, 400, 400, 429])
+
+    def test_login_throttle_short_circuits_before_hashing(self):
+        payload = {'username': 'hasher', 'password': 'wrong'}
+        with patch('accounts.throttles.LoginAttemptThrottle.THROTTLE_RATES', {'login': '2/minute'}):
+            for _ in range(2):
+                self.client.post(reverse('login'), payload, format='json')
+            with patch('accounts.serializers.get_pool') as get_pool:
+                response = self.client.post(reverse('login'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        get_pool.assert_not_called()
+
+
+class SignedTokenTestCase(APITestCase):
+    """Stateless signed access/refresh tokens"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='signed', password='password123')
+        response = self.client.post(reverse('token-obtain'), {'username': 'signed', 'password': 'password123'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.tokens = response.data
+
+    def test_login_creates_no_authtoken_row(self):
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+
+    def test_access_token_authenticates_without_db(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        response = self.client.get(reverse('user-following', args=[self.user.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        with self.assertNumQueries(0):
+            user, payload = SignedTokenAuthentication().authenticate(request)
+            self.assertTrue(user.is_authenticated)
+            self.assertEqual(user.pk, self.user.pk)
+
+    def test_tampered_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}x")
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_and_logout_revokes(self):
+        response = self.client.post(reverse('token-refresh'), {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        fresh = response.data
+        # The old refresh token is single-use
+        response = self.client.post(reverse('token-refresh'), {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {fresh['access']}")
+        response = self.client.post(reverse('logout'), {'refresh': fresh['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_concurrent_refresh_has_one_winner(self):
+        payload = tokens.verify(self.tokens['refresh'], refresh=True)
+        self.assertTrue(tokens.claim(payload))  # another request claimed it after our verify()
+        response = self.client.post(reverse('token-refresh'), {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        self.assertEqual(self.client.get(reverse('feed')).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('token-refresh'), {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.user.delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        self.assertEqual(self.client.get(reverse('feed')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        cache.clear()  # revocation entry evicted: the user load still fails with 401, not 500
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('post-list'), {'title': 't', 'content': 'c'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_db_tokens_still_work(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_200_OK)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProfilePictureTestCase(APITestCase):
+    """Content-addressed profile pictures with background thumbnails"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='pictured', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, color='red'):
+        buffer = BytesIO()
+        Image.new('RGB', (800, 600), color).save(buffer, format='PNG')
+        picture = SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('profile'), {'profile_picture': picture}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        wait_for_thumbnails(timeout=10)
+        return response
+
+    def test_thumbnails_are_generated(self):
+        self.upload()
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.profile_picture.name, r'^profile_pictures/[0-9a-f]{64}\.png$')
+        data = self.client.get(reverse('profile')).data
+        self.assertEqual(sorted(data['thumbnails'], key=int), ['64', '128', '256'])
+        with default_storage.open(thumbnail_name(content_hash(self.user.profile_picture.name), 128)) as fh:
+            self.assertEqual(max(Image.open(fh).size), 128)
+
+    def test_reupload_is_deduplicated(self):
+        self.upload()
+        first = User.objects.get(pk=self.user.pk).profile_picture.name
+        self.upload()
+        self.assertEqual(User.objects.get(pk=self.user.pk).profile_picture.name, first)
+        self.assertEqual(len(default_storage.listdir('profile_pictures')[1]), 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MediaServingTestCase(TestCase):
+    """social_media_api.media.serve_media"""
+
+    def setUp(self):
+        self.name = default_storage.save('profile_pictures/blob.bin', BytesIO(bytes(range(100))))
+        self.url = f'/media/{self.name}'
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_response(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(self.body(response), bytes(range(100)))
+
+    def test_byte_ranges(self):
+        for header, expected in (('bytes=10-19', range(10, 20)), ('bytes=95-', range(95, 100)),
+                                 ('bytes=-3', range(97, 100)), ('bytes=90-500', range(90, 100))):
+            response = self.client.get(self.url, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response['Content-Length'], str(len(expected)))
+            self.assertEqual(response['Content-Range'],
+                             f'bytes {expected[0]}-{expected[-1]}/100')
+            self.assertEqual(self.body(response), bytes(expected))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_suffix_range_of_an_empty_file_is_unsatisfiable(self):
+        name = default_storage.save('profile_pictures/empty.bin', BytesIO(b''))
+        response = self.client.get(f'/media/{name}', HTTP_RANGE='bytes=-500')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_stale_if_range_serves_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_path_traversal_is_rejected(self):
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+
+    @override_settings(MEDIA_SERVE={'BACKEND': 'x-accel-redirect'})
+    def test_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+
+class ConnectionStatsTestCase(APITestCase):
+    """common/pooling.py and the connection-stats endpoint"""
+
+    def test_requests_reuse_the_persistent_connection(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='password123'))
+        before = self.client.get(reverse('connection-stats')).data
+        after = self.client.get(reverse('connection-stats')).data
+        self.assertGreater(after['reused'], before['reused'])
+        self.assertEqual(after['aliases']['default']['max_age'], 600)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(User.objects.create_user(username='plain', password='password123'))
+        self.assertEqual(self.client.get(reverse('connection-stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(REQUEST_BUDGET_ACTION='raise')
+class RequestBudgetTestCase(APITestCase):
+    """common/instrumentation.py: Server-Timing, histogram and per-view budgets"""
+
+    def setUp(self):
+        cache.clear()
+        local_cache().clear()
+        self.user = User.objects.create_user(username='budget', password='password123')
+        self.token = Token.objects.create(user=self.user)
+
+    def test_login_and_profile_stay_within_budget(self):
+        response = self.client.post(reverse('login'), {'username': 'budget', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_200_OK)
+
+        entry = histogram.snapshot()['profile']
+        self.assertGreaterEqual(entry['count'], 2)
+        self.assertLessEqual(entry['max_queries'], ProfileView.request_budget['queries'])
+
+    def test_first_login_creating_the_token_stays_within_budget(self):
+        self.token.delete()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'username': 'budget', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Token.objects.filter(user=self.user).exists())
+        self.assertLessEqual(len(queries), LoginView.request_budget['queries'])
+
+    def test_login_upgrading_the_hash_stays_within_budget(self):
+        self.token.delete()  # worst case: the hash upgrade and the first token in one request
+        with self.settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            self.user.set_password('password123')
+            self.user.save()
+        hashers = ['django.contrib.auth.hashers.PBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher']
+        with self.settings(PASSWORD_HASHERS=hashers), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'username': 'budget', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), LoginView.request_budget['queries'])
+
+    def test_exceeding_the_budget_fails(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        with patch.object(ProfileView, 'request_budget', {'queries': 0, 'total_ms': 0}):
+            with self.assertRaises(BudgetExceeded):
+                self.client.get(reverse('profile'))
+
+
+class BenchmarkHarnessTestCase(APITestCase):
+    """accounts/benchmark.py (the pieces `manage.py benchmark_api` runs inside a scratch database)"""
+
+    def test_power_law_graph_and_actor_timelines(self):
+        actors = seed_network(users=200, follows_per_user=5, posts_per_user=1, actors=4)
+        counts = list(User.objects.order_by('pk').values_list('followers_count', flat=True))
+        # Low ranks collect far more followers than the tail.
+        self.assertGreater(sum(counts[:10]), sum(counts[-100:]))
+
+        key = Token.objects.get(user_id=actors[0]).key
+        samples = run_endpoint(self.client, lambda i: ('GET', reverse('feed'), {'HTTP_AUTHORIZATION': f'Token {key}'}),
+                               requests=3, warmup=0)
+        report = summarize(*samples)
+        self.assertEqual(report['statuses'], {'200': 3})
+        self.assertGreater(report['queries_per_request']['max'], 0)
+
+    def test_every_scenario_succeeds(self):
+        cache.clear()  # throttle history
+        actors = seed_network(users=60, follows_per_user=3, posts_per_user=1, actors=4)
+        command = BenchmarkCommand()
+        scenarios = command.scenarios(random.Random(0), actors)
+        for name, make_request in scenarios.items():
+            report = summarize(*run_endpoint(self.client, make_request, requests=2, warmup=1,
+                                             after_each=command.next_refresh if name == 'token-refresh' else None))
+            self.assertTrue(all(code.startswith('2') for code in report['statuses']), (name, report['statuses']))
+
+
+class UserBatchTestCase(APITestCase):
+    """GET users/batch/?ids=..."""
+
+    def test_results_follow_request_order_with_not_found_markers(self):
+        alice = User.objects.create_user(username='alice', password='password123')
+        bob = User.objects.create_user(username='bob', password='password123')
+        inactive = User.objects.create_user(username='gone', password='password123', is_active=False)
+        self.client.force_authenticate(alice)
+
+        ids = [bob.pk, inactive.pk, alice.pk]
+        response = self.client.get(reverse('user-batch'), {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(r['id'], r['status']) for r in response.data['results']],
+                         [(bob.pk, 'found'), (inactive.pk, 'not_found'), (alice.pk, 'found')])
+        self.assertEqual(response.data['results'][0]['data']['username'], 'bob')
+        self.assertNotIn('email', response.data['results'][0]['data'])
+
+
+class SparseFieldsetsTestCase(APITestCase):
+    """?fields= on UserSerializer / PublicUserSerializer (common/fieldsets.py)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sparse', password='password123', email='s@example.com')
+        self.client.force_authenticate(self.user)
+
+    def test_profile_fields_skip_unrequested_method_fields(self):
+        with patch('accounts.serializers.images.thumbnail_urls') as thumbnail_urls:
+            response = self.client.get(reverse('profile'), {'fields': 'id,username'})
+        self.assertEqual(response.data, {'id': self.user.pk, 'username': 'sparse'})
+        thumbnail_urls.assert_not_called()
+
+    def test_writes_ignore_fields(self):
+        response = self.client.patch(reverse('profile') + '?fields=id', {'bio': 'hello'}, format='json')
+        self.assertEqual(response.data['bio'], 'hello')
+
+    def test_batch_selects_only_requested_columns(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('user-batch'), {'ids': self.user.pk, 'fields': 'username'})
+        self.assertEqual(response.data['results'][0]['data'], {'username': 'sparse'})
+        select = next(q['sql'] for q in context.captured_queries if 'FROM "accounts_user"' in q['sql'])
+        self.assertNotIn('"bio"', select)
+
+
+class JSONRendererTestCase(APITestCase):
+    """common/renderers.py matches DRF's JSON output and parsing"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='renderer', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def test_profile_output_is_identical_to_drf(self):
+        self.user.bio = 'line\u2028separator \u00e9'
+        self.user.save()
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(b''.join(iter_json_array([response.data], 1)), FastJSONRenderer().render([response.data]))
+
+    def test_profile_accepts_json_and_rejects_invalid_json(self):
+        response = self.client.patch(reverse('profile'), {'bio': 'Hello'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bio'], 'Hello')
+        response = self.client.patch(reverse('profile'), b'{"bio": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ResponseCompressionTestCase(APITestCase):
+    """common.compression.CompressionMiddleware"""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(username=f'reader{i}', password='password123', bio='x' * 40)
+                      for i in range(30)]
+        self.client.force_authenticate(self.users[0])
+        self.url = reverse('user-batch') + '?ids=' + ','.join(str(user.id) for user in self.users)
+
+    def test_json_is_compressed_when_accepted(self):
+        plain = self.client.get(self.url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0.5, deflate;q=0.1')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_media_is_passed_through(self):
+        name = default_storage.save('profile_pictures/picture.png', BytesIO(b'\x89PNG' + bytes(4096)))
+        response = self.client.get(f'/media/{name}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(len(b''.join(response.streaming_content)), 4100)
+
+    def test_variants_are_cached_under_the_response_key(self):
+        def view(request):
+            response = HttpResponse(b'{"data": "%s"}' % (b'abc' * 1000), content_type='application/json')
+            response.compression_cache_key = 'test:page'
+            return response
+
+        middleware = CompressionMiddleware(view)
+        request = APIRequestFactory().get('/', HTTP_ACCEPT_ENCODING='deflate')
+        with patch('common.compression.zlib.compress', wraps=zlib.compress) as compress:
+            first, second = middleware(request), middleware(request)
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual((first['X-Compression-Cache'], second['X-Compression-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(zlib.decompress(second.content), b'{"data": "%s"}' % (b'abc' * 1000))
+
+    def test_a_new_body_under_the_same_key_replaces_the_variant(self):
+        bodies = iter([b'abc', b'xyz', b'xyz'])
+
+        def view(request):
+            response = HttpResponse(b'{"data": "%s"}' % (next(bodies) * 1000), content_type='application/json')
+            response.compression_cache_key = 'test:page'
+            return response
+
+        middleware = CompressionMiddleware(view)
+        request = APIRequestFactory().get('/', HTTP_ACCEPT_ENCODING='deflate')
+        responses = [middleware(request) for _ in range(3)]
+        self.assertEqual([response['X-Compression-Cache'] for response in responses], ['MISS', 'MISS', 'HIT'])
+        self.assertEqual(zlib.decompress(responses[2].content), b'{"data": "%s"}' % (b'xyz' * 1000))
+        # The single slot for this representation now holds the new body.
+        _, body = cache.get(f"test:page:deflate:{sha1(b'application/json').hexdigest()}")
+        self.assertEqual(body, responses[2].content)
+
+    def test_html_is_not_compressed(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(b'<p>' * 1000, content_type='text/html'))
+        response = middleware(APIRequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertNotIn('Content-Encoding', response)
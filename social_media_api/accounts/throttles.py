@@ -0,0 +1,35 @@
+# accounts/throttles.py
+from rest_framework.throttling import SimpleRateThrottle
+
+class LoginAttemptThrottle(SimpleRateThrottle):
+    """
+    Limits login attempts per (username, client IP) pair.
+    Throttles run in APIView.initial(), so a throttled attempt never reaches
+    the password hasher.
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        data = request.data if isinstance(request.data, dict) else {}
+        username = str(data.get('username', '')).strip().lower()
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': f'{username}:{self.get_ident(request)}',
+        }
+
+class LoginIPThrottle(SimpleRateThrottle):
+    """
+    Limits login attempts per client IP, whatever the username, so one
+    address can't spray guesses across many accounts.
+    """
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+class RegisterThrottle(SimpleRateThrottle):
+    """Limits sign-ups per client IP."""
+    scope = 'register'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
@@ -0,0 +1,155 @@
+# accounts/tokens.py
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+DEFAULTS = {
+    'ACCESS_TTL': 5 * 60,             # seconds
+    'REFRESH_TTL': 14 * 24 * 60 * 60,
+    'CACHE_ALIAS': 'default',         # holds the revocation list; must be shared across workers
+}
+
+ACCESS_SALT = 'accounts.tokens.access'
+REFRESH_SALT = 'accounts.tokens.refresh'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'SIGNED_TOKENS', {})}
+
+
+def _revocations():
+    return caches[get_config()['CACHE_ALIAS']]
+
+
+def _sign(user_id, salt, ttl):
+    jti = uuid.uuid4().hex
+    # `exp` lets revoke() size the revocation entry without re-reading the signer.
+    payload = {'uid': user_id, 'jti': jti, 'exp': int(time.time()) + ttl}
+    return signing.dumps(payload, salt=salt, compress=True)
+
+
+def issue_tokens(user):
+    """Returns a fresh `{'access', 'refresh'}` pair; no database writes."""
+    config = get_config()
+    return {
+        'access': _sign(user.pk, ACCESS_SALT, config['ACCESS_TTL']),
+        'refresh': _sign(user.pk, REFRESH_SALT, config['REFRESH_TTL']),
+        'access_expires_in': config['ACCESS_TTL'],
+    }
+
+
+def verify(token, refresh=False):
+    """Returns the payload of a valid, unexpired, unrevoked token or raises AuthenticationFailed."""
+    config = get_config()
+    salt, ttl = (REFRESH_SALT, config['REFRESH_TTL']) if refresh else (ACCESS_SALT, config['ACCESS_TTL'])
+    try:
+        payload = signing.loads(token, salt=salt, max_age=ttl)
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed('Token expired.')
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Invalid token.')
+    token_key, user_key = f'auth:revoked:{payload["jti"]}', f'auth:user-revoked:{payload["uid"]}'
+    entries = _revocations().get_many([token_key, user_key])  # one round-trip for both lists
+    if token_key in entries:
+        raise exceptions.AuthenticationFailed('Token revoked.')
+    # `exp - ttl` is the issue time: tokens signed up to the user's revocation are dead.
+    if user_key in entries and payload['exp'] - ttl <= entries[user_key]:
+        raise exceptions.AuthenticationFailed('Token revoked.')
+    return payload
+
+
+def revoke(payload):
+    """
+    Adds the token id to the revocation list until the token would have
+    expired anyway, so the list only ever holds live tokens.
+    """
+    remaining = payload['exp'] - int(time.time())
+    if remaining > 0:
+        _revocations().set(f'auth:revoked:{payload["jti"]}', True, remaining)
+
+
+def claim(payload):
+    """
+    Atomically revokes the token id; returns False if it was already revoked
+    (e.g. a concurrent refresh with the same single-use token won the race).
+    """
+    remaining = payload['exp'] - int(time.time())
+    return remaining > 0 and _revocations().add(f'auth:revoked:{payload["jti"]}', True, remaining)
+
+
+def is_revoked(jti):
+    return _revocations().get(f'auth:revoked:{jti}') is not None
+
+
+def revoke_user(user_id):
+    """
+    Revokes every token issued to the user so far (on deactivation or delete).
+    Kept for REFRESH_TTL, after which any such token has expired anyway.
+    """
+    config = get_config()
+    _revocations().set(f'auth:user-revoked:{user_id}', int(time.time()), config['REFRESH_TTL'])
+
+
+def _load_user(user_id):
+    user = get_user_model()._default_manager.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        raise exceptions.AuthenticationFailed('User inactive or deleted.')
+    return user
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    The authenticated user for a signed token.
+
+    `pk`/`id`/`is_authenticated` come from the token itself; the User row is
+    only loaded if a view reads any other attribute. A user deleted or
+    deactivated since the token was issued fails that load with
+    AuthenticationFailed (401), in case the revocation entry was evicted.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        super().__init__(lambda: _load_user(user_id))
+        self.__dict__['_token_user_id'] = user_id
+
+    @property
+    def pk(self):
+        return self.__dict__['_token_user_id']
+
+    id = pk
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Stateless `Authorization: Bearer <access token>` authentication.
+
+    Verifying an access token is an HMAC check plus one cache lookup against
+    the token and per-user revocation lists; it never touches the database. Use alongside
+    TokenAuthentication (`Authorization: Token <key>`), which keeps working.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        payload = verify(token)
+        return TokenUser(payload['uid']), payload
+
+    def authenticate_header(self, request):
+        return self.keyword
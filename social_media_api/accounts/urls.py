@@ -1,7 +1,11 @@
-
 # accounts/urls.py
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView
+from .views import (
+    RegisterView, LoginView, ProfileView,
+    FollowView, UnfollowView, BulkFollowView, FollowersListView, FollowingListView,
+    SignedTokenObtainView, SignedTokenRefreshView, SignedTokenLogoutView,
+    ConnectionStatsView, UserBatchView,
+)
 
 urlpatterns = [
     path('register', RegisterView.as_view()),
@@ -10,4 +14,16 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('token/', SignedTokenObtainView.as_view(), name='token-obtain'),
+    path('token/refresh/', SignedTokenRefreshView.as_view(), name='token-refresh'),
+    path('logout/', SignedTokenLogoutView.as_view(), name='logout'),
+
+    path('follow/<int:user_id>/', FollowView.as_view(), name='follow'),
+    path('unfollow/<int:user_id>/', UnfollowView.as_view(), name='unfollow'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='follow-bulk'),
+    path('users/<int:user_id>/followers/', FollowersListView.as_view(), name='user-followers'),
+    path('users/<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
+    path('users/batch/', UserBatchView.as_view(), name='user-batch'),
+
+    path('stats/connections/', ConnectionStatsView.as_view(), name='connection-stats'),
 ]
@@ -1,77 +1,111 @@
-from django.shortcuts import render
-
-# Create your views here.
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status, permissions
-from rest_framework.authtoken.models import Token
-from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
-
-class RegisterView(APIView):
-    permission_classes = [permissions.AllowAny]
 # accounts/views.py
-from django.contrib.auth import authenticate, get_user_model
-from rest_framework import permissions, status, parsers
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status, parsers
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .serializers import RegisterSerializer, UserSerializer
+from common.batch import BatchRetrieveAPIView
+from common.fieldsets import SparseFieldsetsViewMixin
+from common.pooling import stats as connection_stats
+from common.renderers import FastJSONParser
+from .serializers import (
+    FollowerEdgeSerializer,
+    FollowingEdgeSerializer,
+    LoginSerializer,
+    PublicUserSerializer,
+    RegisterSerializer,
+    UserSerializer,
+)
+from .signals import Follow
+from .throttles import LoginAttemptThrottle, LoginIPThrottle, RegisterThrottle
+from . import tokens
 
 User = get_user_model()
 
+# Register/Login hash passwords on a bounded pool (accounts/hashing.py): a burst
+# gets 503 + Retry-After instead of starving workers. Throttles reject before hashing.
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegisterThrottle]
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
             token, _ = Token.objects.get_or_create(user=user)
-
-            return Response({'token': token.key, 'user': UserSerializer(user).data}, status=status.HTTP_201_CREATED)
-
             return Response(
                 {'token': token.key, 'user': UserSerializer(user, context={'request': request}).data},
                 status=status.HTTP_201_CREATED
             )
-
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginAttemptThrottle, LoginIPThrottle]
+    # User lookup + token get_or_create; a first login inserts the token inside
+    # get_or_create's savepoint: SELECT, SAVEPOINT, INSERT, RELEASE. A login that
+    # upgrades an outdated hash adds the password UPDATE and the cached-token
+    # eviction SELECT (accounts/signals.py), on the hashing pool (measured: 7)
+    request_budget = {'queries': 7}
 
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
             token, _ = Token.objects.get_or_create(user=user)
-            return Response({'token': token.key, 'user': UserSerializer(user).data})
+            return Response({'token': token.key, 'user': UserSerializer(user, context={'request': request}).data})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class ProfileView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
-    def get(self, request):
-        return Response(UserSerializer(request.user).data)
-
+# Signed access/refresh tokens (accounts/tokens.py): an alternative to the
+# DB-backed authtoken that needs no Token row on login and no lookup per request.
+class SignedTokenObtainView(APIView):
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginAttemptThrottle, LoginIPThrottle]
 
     def post(self, request):
-        username = request.data.get('username')
-        password = request.data.get('password')
+        serializer = LoginSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            return Response(tokens.issue_tokens(serializer.validated_data['user']))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        if not username or not password:
-            return Response({'detail': 'username and password are required.'}, status=status.HTTP_400_BAD_REQUEST)
+class SignedTokenRefreshView(APIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []  # clients refresh with an expired access token in hand
 
-        user = authenticate(request, username=username, password=password)
-        if not user:
-            return Response({'detail': 'Invalid credentials.'}, status=status.HTTP_401_UNAUTHORIZED)
+    def post(self, request):
+        try:
+            payload = tokens.verify(str(request.data.get('refresh', '')), refresh=True)
+        except AuthenticationFailed as exc:
+            return Response({'detail': exc.detail}, status=status.HTTP_401_UNAUTHORIZED)
+        # Refresh tokens are single-use; only one of two concurrent refreshes wins the claim.
+        if not tokens.claim(payload):
+            return Response({'detail': 'Token revoked.'}, status=status.HTTP_401_UNAUTHORIZED)
+        user = User.objects.filter(pk=payload['uid'], is_active=True).first()
+        if user is None:
+            return Response({'detail': 'User inactive or deleted.'}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response(tokens.issue_tokens(user))
+
+class SignedTokenLogoutView(APIView):
+    permission_classes = [permissions.AllowAny]
 
-        token, _ = Token.objects.get_or_create(user=user)
-        return Response({'token': token.key, 'user': UserSerializer(user, context={'request': request}).data})
+    def post(self, request):
+        if isinstance(request.auth, dict):  # authenticated with a signed access token
+            tokens.revoke(request.auth)
+        refresh = request.data.get('refresh')
+        if refresh:
+            tokens.revoke(tokens.verify(str(refresh), refresh=True))
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class ProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = [parsers.JSONParser, parsers.FormParser, parsers.MultiPartParser]
+    request_budget = {'queries': 4}
+    parser_classes = [FastJSONParser, parsers.FormParser, parsers.MultiPartParser]
 
     def get(self, request):
         return Response(UserSerializer(request.user, context={'request': request}).data)
@@ -90,3 +124,120 @@ class ProfileView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+
+# Follow graph
+# Edges live in User.followers.through as (from_user=followed, to_user=follower).
+
+# Follows by one user are serialized on that user's row, so two concurrent
+# requests can't both see an edge as missing and count it twice. (SQLite's
+# IMMEDIATE transactions already serialize writers; FOR UPDATE covers others.)
+def lock_follower(user):
+    User.objects.select_for_update().filter(pk=user.pk).values_list('pk').first()
+
+class FollowView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, user_id):
+        target = get_object_or_404(User, pk=user_id)
+        if target.pk == request.user.pk:
+            return Response({'detail': 'You cannot follow yourself.'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            lock_follower(request.user)
+            target.followers.add(request.user)  # counters updated by m2m_changed
+        return Response({'detail': f'You are now following {target.username}.'})
+
+class UnfollowView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, user_id):
+        target = get_object_or_404(User, pk=user_id)
+        with transaction.atomic():
+            lock_follower(request.user)
+            target.followers.remove(request.user)
+        return Response({'detail': f'You are no longer following {target.username}.'})
+
+class BulkFollowView(APIView):
+    """
+    Follow up to `max_users` users in one call: {"user_ids": [1, 2, 3]}.
+    Inserts all edges with one bulk_create(ignore_conflicts=True); users that
+    were already followed are skipped, unknown ids are reported back.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_users = 1000
+
+    def post(self, request):
+        user_ids = request.data.get('user_ids')
+        if not isinstance(user_ids, list) or not all(
+                isinstance(pk, int) and not isinstance(pk, bool) for pk in user_ids):
+            return Response({'user_ids': ['Expected a list of user ids.']}, status=status.HTTP_400_BAD_REQUEST)
+        if len(user_ids) > self.max_users:
+            return Response({'user_ids': [f'At most {self.max_users} ids per request.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        wanted = set(user_ids) - {request.user.pk}
+        with transaction.atomic():
+            lock_follower(request.user)
+            targets = set(User.objects.filter(pk__in=wanted).values_list('pk', flat=True))
+            already = set(Follow.objects.filter(from_user_id__in=targets, to_user_id=request.user.pk)
+                          .values_list('from_user_id', flat=True))
+            new = targets - already
+            Follow.objects.bulk_create(
+                [Follow(from_user_id=pk, to_user_id=request.user.pk) for pk in new],
+                ignore_conflicts=True,
+            )
+            # bulk_create skips m2m_changed; send the post_add that
+            # `request.user.following.add(*new)` would have, so counters and
+            # timelines are kept in step by their receivers.
+            m2m_changed.send(sender=Follow, instance=request.user, action='post_add',
+                             reverse=True, model=User, pk_set=new, using=router.db_for_write(Follow))
+
+        return Response({
+            'followed': sorted(new),
+            'already_following': sorted(already),
+            'not_found': sorted(wanted - targets),
+        })
+
+class FollowEdgePagination(CursorPagination):
+    # Edge ids are unique, so this is a pure keyset seek (id < cursor), newest first.
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+class FollowersListView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = FollowerEdgeSerializer
+    request_budget = {'queries': 3}
+    pagination_class = FollowEdgePagination
+
+    def get_queryset(self):
+        user = get_object_or_404(User, pk=self.kwargs['user_id'])
+        return Follow.objects.filter(from_user=user).select_related('to_user')
+
+class FollowingListView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = FollowingEdgeSerializer
+    request_budget = {'queries': 3}
+    pagination_class = FollowEdgePagination
+
+    def get_queryset(self):
+        user = get_object_or_404(User, pk=self.kwargs['user_id'])
+        return Follow.objects.filter(to_user=user).select_related('from_user')
+
+
+# User cards for many ids in one request: GET users/batch/?ids=3,1,9
+# One in_bulk() query; results in request order with not_found markers (common/batch.py)
+# ?fields= narrows the cards and the selected columns (common/fieldsets.py)
+class UserBatchView(SparseFieldsetsViewMixin, BatchRetrieveAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = User.objects.filter(is_active=True)
+    serializer_class = PublicUserSerializer
+    request_budget = {'queries': 3}
+
+
+# Persistent database connection usage (common/pooling.py): staff only
+class ConnectionStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(connection_stats.snapshot())
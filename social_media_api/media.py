@@ -0,0 +1,157 @@
+# social_media_api/media.py
+"""
+Media file serving for production.
+
+- `MEDIA_SERVE['BACKEND'] = 'x-accel-redirect'` (nginx) or `'x-sendfile'`
+  (Apache/lighttpd) hands the transfer to the front proxy: Python only
+  resolves the path and returns headers.
+- Without a proxy, files go out through FileResponse; WSGI servers that
+  provide `wsgi.file_wrapper` (gunicorn, uWSGI) then use `os.sendfile`,
+  including for byte ranges.
+- Single byte ranges (`Range: bytes=...`, honouring `If-Range`) get 206,
+  and ETag / Last-Modified validators give 304s.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+DEFAULTS = {
+    'BACKEND': None,                    # None, 'x-sendfile' or 'x-accel-redirect'
+    'ACCEL_PREFIX': '/protected-media/',  # nginx `internal` location aliasing MEDIA_ROOT
+    'MAX_AGE': 24 * 60 * 60,
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'MEDIA_SERVE', {})}
+
+
+class FileRange:
+    """
+    Read-only view of `length` bytes of an open file, starting at `start`.
+
+    The underlying descriptor is positioned at `start` and `fileno()` is
+    exposed, so `wsgi.file_wrapper` implementations can sendfile() exactly
+    Content-Length bytes; plain iteration stops at the range end as well.
+    """
+
+    def __init__(self, fh, start, length):
+        fh.seek(start)
+        self._fh = fh
+        self._remaining = length
+        self.name = fh.name
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def close(self):
+        self._fh.close()
+
+
+def parse_range(header, size):
+    """Returns `(start, end)` inclusive for a single satisfiable range, `None` to ignore, or raises ValueError (416)."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None  # malformed or multi-range: serve the whole file
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:  # no byte of an empty file can be selected
+            raise ValueError
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found.')
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        raise Http404('Not found.')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('Not found.')
+
+    config = get_config()
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    last_modified = int(st.st_mtime)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    if config['BACKEND'] in ('x-sendfile', 'x-accel-redirect'):
+        # The proxy streams the file and handles Range itself.
+        response = HttpResponse(content_type=content_type)
+        if config['BACKEND'] == 'x-sendfile':
+            response['X-Sendfile'] = fullpath
+        else:
+            response['X-Accel-Redirect'] = config['ACCEL_PREFIX'].rstrip('/') + '/' + path.lstrip('/')
+    else:
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if range_header and _if_range_matches(request, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, st.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{st.st_size}'
+                return response
+
+        fh = open(fullpath, 'rb')
+        if byte_range is None:
+            response = FileResponse(fh, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = FileResponse(FileRange(fh, start, end - start + 1), content_type=content_type,
+                                    status=206)
+            response['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+            response['Content-Length'] = end - start + 1
+        response['Accept-Ranges'] = 'bytes'
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=config['MAX_AGE'])
+    return response
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
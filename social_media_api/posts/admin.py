@@ -0,0 +1,9 @@
+# posts/admin.py
+from django.contrib import admin
+from .models import Post
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    list_display = ('id', 'author', 'created_at')
+    search_fields = ('content',)
+    raw_id_fields = ('author',)
@@ -0,0 +1,41 @@
+# posts/models.py
+from django.conf import settings
+from django.db import models
+
+class Post(models.Model):
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='posts')
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # Read-time merge of high-follower authors: newest posts per author
+            models.Index(fields=['author', '-id'], name='post_author_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.author} #{self.pk}'
+
+class TimelineEntry(models.Model):
+    """
+    One row per (reader, post): the materialized home timeline.
+
+    Filled on write by posts/timeline.py. Reading a timeline is a range scan
+    over the (user, post) unique index in post-id order. `author` is copied
+    from the post so unfollowing can drop entries without a JOIN.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='timeline_user_post_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} <- post {self.post_id}'
@@ -0,0 +1,38 @@
+# posts/signals.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from . import timeline
+from .models import Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: timeline.fan_out(instance))
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+def sync_timelines(sender, instance, action, reverse, pk_set, **kwargs):
+    # Forward (`a.followers.add(b)`): instance is followed by pk_set.
+    # Reverse (`b.following.add(a)`): instance follows pk_set.
+    if action == 'post_add':
+        if reverse:
+            timeline.backfill(instance.pk, pk_set)
+        else:
+            for follower_id in pk_set:
+                timeline.backfill(follower_id, [instance.pk])
+    elif action == 'post_remove':
+        if reverse:
+            timeline.drop(follower_ids=[instance.pk], author_ids=pk_set)
+        else:
+            timeline.drop(follower_ids=pk_set, author_ids=[instance.pk])
+    elif action == 'pre_clear':
+        if reverse:
+            timeline.drop(follower_ids=[instance.pk])
+        else:
+            timeline.drop(author_ids=[instance.pk])
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTestCase(APITestCase):
+    """Fan-out-on-write home timelines"""
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.writer = User.objects.create_user(username='writer', password='password123')
+        self.writer.followers.add(self.reader)
+        self.reader.refresh_from_db()  # pick up following_count, as a real request would
+        self.client.force_authenticate(self.reader)
+
+    def post(self, author, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(author=author, content=content)
+
+    def feed(self, url=None):
+        response = self.client.get(url or reverse('feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_posts_are_fanned_out_to_followers(self):
+        first = self.post(self.writer, 'first')
+        second = self.post(self.writer, 'second')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=first).exists())
+        self.assertEqual([p['id'] for p in self.feed()['results']], [second.id, first.id])
+
+    def test_feed_is_keyset_paginated(self):
+        posts = [self.post(self.writer, f'post {i}') for i in range(5)]
+        page = self.feed(reverse('feed') + '?page_size=2')
+        ids = [p['id'] for p in page['results']]
+        while page['next']:
+            page = self.feed(page['next'])
+            ids += [p['id'] for p in page['results']]
+        self.assertEqual(ids, [p.id for p in reversed(posts)])
+
+    def test_follow_backfills_and_unfollow_drops(self):
+        other = User.objects.create_user(username='other', password='password123')
+        old = self.post(other, 'before follow')
+        self.reader.following.add(other)
+        self.assertIn(old.id, [p['id'] for p in self.feed()['results']])
+
+        self.reader.following.remove(other)
+        self.assertNotIn(old.id, [p['id'] for p in self.feed()['results']])
+
+    def test_bulk_follow_backfills(self):
+        other = User.objects.create_user(username='other', password='password123')
+        old = self.post(other, 'before follow')
+        self.client.post(reverse('follow-bulk'), {'user_ids': [other.id]}, format='json')
+        self.assertIn(old.id, [p['id'] for p in self.feed()['results']])
+
+    @override_settings(TIMELINE_BACKFILL=2)
+    def test_bulk_follow_backfill_is_one_query_per_chunk(self):
+        authors = [User.objects.create_user(username=f'author{i}', password='password123') for i in range(6)]
+        posts = {author.pk: [self.post(author, f'{author.username} {n}').pk for n in range(3)] for author in authors}
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('follow-bulk'), {'user_ids': [a.pk for a in authors]}, format='json')
+        self.assertEqual(sum('FROM "posts_post"' in q['sql'] for q in queries.captured_queries), 1)
+        backfilled = set(TimelineEntry.objects.filter(user=self.reader).values_list('post_id', flat=True))
+        self.assertEqual(backfilled, {pk for ids in posts.values() for pk in ids[1:]})  # the 2 newest each
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_high_follower_accounts_merge_at_read_time(self):
+        mine = self.post(self.reader, 'my own post')
+        star_post = self.post(self.writer, 'from a star')
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=star_post).exists())
+        self.assertEqual([p['id'] for p in self.feed()['results']], [star_post.id, mine.id])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_read_time_merge_does_not_trust_a_stale_following_count(self):
+        fan = User.objects.create_user(username='fan', password='password123')
+        self.writer.followers.add(fan)  # `fan` still says following_count=0
+        star_post = self.post(self.writer, 'from a star')
+        self.client.force_authenticate(fan)
+        self.assertEqual([p['id'] for p in self.feed()['results']], [star_post.id])
+
+    def test_invalid_page_size_and_cursor(self):
+        for query in ('?page_size=0', '?page_size=-1', '?page_size=x', '?before=-5', f'?before={2 ** 70}'):
+            response = self.client.get(reverse('feed') + query)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_timeline_read_query_count(self):
+        for i in range(3):
+            self.post(self.writer, f'post {i}')
+        with self.assertNumQueries(2):  # timeline range scan + high-follower lookup
+            self.feed()
@@ -0,0 +1,114 @@
+# posts/timeline.py
+"""
+Home timelines, fan-out-on-write.
+
+- When a post is created it is copied into the TimelineEntry table of the
+  author and of every follower, in `bulk_create` batches.
+- Authors with more than TIMELINE_FANOUT_MAX_FOLLOWERS followers are not
+  fanned out; their posts are merged in when a follower reads the timeline.
+- Follow/unfollow backfills or drops the author's entries for that reader.
+"""
+import heapq
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Post, TimelineEntry
+
+User = get_user_model()
+Follow = User.followers.through
+
+BATCH_SIZE = 1000
+
+
+def fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 10000)
+
+
+def backfill_size():
+    return getattr(settings, 'TIMELINE_BACKFILL', 50)
+
+
+def is_fanned_out(author_id):
+    # Read the stored counter fresh; the in-memory author may predate recent follows.
+    count = User.objects.filter(pk=author_id).values_list('followers_count', flat=True).first()
+    return (count or 0) <= fanout_limit()
+
+
+def fan_out(post):
+    """Writes `post` into its author's timeline and, for normal accounts, every follower's."""
+    entries = [TimelineEntry(user_id=post.author_id, post=post, author_id=post.author_id)]
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    if not is_fanned_out(post.author_id):
+        return
+
+    # Forward edges are stored as (from_user=followed, to_user=follower).
+    follower_ids = (Follow.objects.filter(from_user_id=post.author_id)
+                    .values_list('to_user_id', flat=True).iterator(chunk_size=BATCH_SIZE))
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(TimelineEntry(user_id=follower_id, post_id=post.pk, author_id=post.author_id))
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill(follower_id, author_ids):
+    """Copies the latest posts of newly followed (fanned-out) authors into a timeline."""
+    author_ids = list(author_ids)
+    for start in range(0, len(author_ids), BATCH_SIZE):
+        # One query per chunk: each author's newest posts, ranked per author.
+        authors = User.objects.filter(pk__in=author_ids[start:start + BATCH_SIZE],
+                                      followers_count__lte=fanout_limit())
+        latest = (Post.objects.filter(author_id__in=authors.values('pk'))
+                  .annotate(rank=Window(RowNumber(), partition_by=F('author_id'), order_by=F('id').desc()))
+                  .filter(rank__lte=backfill_size())
+                  .values_list('pk', 'author_id'))
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=follower_id, post_id=pk, author_id=author_id) for pk, author_id in latest],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+
+
+def drop(follower_ids=None, author_ids=None):
+    """Removes followed-author entries after unfollows; a user's own posts stay."""
+    entries = TimelineEntry.objects.exclude(user_id=F('author_id'))
+    if follower_ids is not None:
+        entries = entries.filter(user_id__in=follower_ids)
+    if author_ids is not None:
+        entries = entries.filter(author_id__in=author_ids)
+    entries.delete()
+
+
+def read(user, before=None, limit=20):
+    """
+    Returns up to `limit` posts for `user`'s home timeline, newest first,
+    with ids below `before` (keyset cursor).
+    """
+    entries = TimelineEntry.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(post_id__lt=before)
+    posts = [entry.post for entry in
+             entries.order_by('-post_id').select_related('post__author')[:limit]]
+
+    # Followed accounts that are too big to fan out are merged at read time.
+    # One query with the followed set as a subquery; `user.following_count`
+    # isn't trusted here since `user` may be older than the latest follow.
+    big = user.following.filter(followers_count__gt=fanout_limit()).values('pk')
+    extra = Post.objects.filter(author_id__in=big).select_related('author')
+    if before is not None:
+        extra = extra.filter(pk__lt=before)
+    extra = list(extra.order_by('-id')[:limit])
+    if extra:
+        merged = heapq.merge(posts, extra, key=lambda p: -p.pk)
+        posts, seen = [], set()
+        for post in merged:
+            if post.pk not in seen:
+                seen.add(post.pk)
+                posts.append(post)
+        posts = posts[:limit]
+    return posts
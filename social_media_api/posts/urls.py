@@ -0,0 +1,9 @@
+# posts/urls.py
+from django.urls import path
+from .views import PostListCreateView, PostDetailView, FeedView
+
+urlpatterns = [
+    path('posts/', PostListCreateView.as_view(), name='post-list'),
+    path('posts/<int:pk>/', PostDetailView.as_view(), name='post-detail'),
+    path('feed/', FeedView.as_view(), name='feed'),
+]
@@ -0,0 +1,66 @@
+# posts/views.py
+from rest_framework import generics, permissions, status
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from . import timeline
+from .models import Post
+from .serializers import PostSerializer
+
+class IsAuthorOrReadOnly(permissions.BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return request.method in permissions.SAFE_METHODS or obj.author_id == request.user.pk
+
+class PostPagination(CursorPagination):
+    ordering = '-id'
+    page_size = 20
+
+class PostListCreateView(generics.ListCreateAPIView):
+    queryset = Post.objects.select_related('author')
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PostPagination
+
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)  # fanned out by posts/signals.py
+
+class PostDetailView(generics.RetrieveDestroyAPIView):
+    queryset = Post.objects.select_related('author')
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+
+class FeedView(APIView):
+    """
+    The requesting user's home timeline, newest first.
+    Page with `?before=<post id>` (the `next` link carries it).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+    request_budget = {'queries': 3}  # auth + timeline page (common/instrumentation.py)
+
+    def get(self, request):
+        try:
+            before = int(request.query_params['before'])
+        except (KeyError, ValueError):
+            before = None
+        if before is not None and not 0 < before < 2 ** 63:
+            return Response({'before': ['Must be a post id.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('page_size', self.page_size))
+        except ValueError:
+            return Response({'page_size': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'page_size': ['Must be at least 1.']}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, self.max_page_size)
+
+        posts = timeline.read(request.user, before=before, limit=limit)
+        next_link = None
+        if len(posts) == limit and posts:
+            next_link = replace_query_param(request.build_absolute_uri(), 'before', posts[-1].pk)
+        return Response({
+            'next': next_link,
+            'results': PostSerializer(posts, many=True, context={'request': request}).data,
+        })
@@ -1,28 +1,23 @@
-
+# social_media_api/settings.py
 from pathlib import Path
 import os
-from datetime import timedelta
+import sys
 
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Helpers shared with advanced-api-project live in the repository's `common` package
+if str(BASE_DIR) not in sys.path:
+    sys.path.append(str(BASE_DIR))
+
+from common.db import DEFAULT_PRAGMAS, sqlite_databases  # noqa: E402
+
 # SECURITY
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'dev-secret')  # Use env var in production
 DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS', '').split(',') if not DEBUG else []
 
 # Installed apps
-
-# social_media_api/settings.py
-from pathlib import Path
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-SECRET_KEY = 'replace-me-in-production'
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -37,19 +32,15 @@ INSTALLED_APPS = [
 
     # Local apps
     'accounts',
+    'posts',
 ]
 
 # Middleware
-
-    # Third-party
-    'rest_framework',
-    'rest_framework.authtoken',
-
-    # Local
-    'accounts',
-]
-
 MIDDLEWARE = [
+    # Outermost: query count / timings for the whole request (common/instrumentation.py)
+    'common.instrumentation.RequestMetricsMiddleware',
+    # gzip/deflate (br/zstd when installed) above a size threshold (common/compression.py)
+    'common.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,12 +55,6 @@ ROOT_URLCONF = 'social_media_api.urls'
 WSGI_APPLICATION = 'social_media_api.wsgi.application'
 
 # Templates
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / "templates"],  # custom templates dir
-ROOT_URLCONF = 'social_media_api.urls'
-
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -85,18 +70,22 @@ TEMPLATES = [
         },
     },
 ]
-WSGI_APPLICATION = 'social_media_api.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Database
+# Writer ('default') + read-only 'replica' alias on the same SQLite file, both
+# tuned with SQLITE_PRAGMAS on connect (see common/db.py). `migrate` switches the
+# file to WAL once (accounts/migrations/0003_enable_wal.py).
+# Connections persist for DB_CONN_MAX_AGE seconds with health checks; usage is
+# reported by the connection-stats endpoint (common/pooling.py).
+SQLITE_PRAGMAS = {**DEFAULT_PRAGMAS}
+DB_CONN_MAX_AGE = int(os.getenv('DJANGO_DB_CONN_MAX_AGE', '600'))
+DATABASES = sqlite_databases(BASE_DIR / 'db.sqlite3', pragmas=SQLITE_PRAGMAS, conn_max_age=DB_CONN_MAX_AGE)
+DATABASE_ROUTERS = ['common.db.ReadWriteRouter']
+
 # Authentication
 AUTH_USER_MODEL = 'accounts.User'
 
-# Password validators (added back for security)
+# Password validators
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -114,54 +103,110 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 # Internationalization
-
-AUTH_PASSWORD_VALIDATORS = [
-    {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
-    {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
-    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
-    {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
-]
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
-# Static & Media files
+# Static & Media files (media holds profile pictures)
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_DIRS = [BASE_DIR / "static"]
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Request instrumentation (common/instrumentation.py): 'log' or 'raise'
+# when a view exceeds its `request_budget`.
+REQUEST_BUDGET_ACTION = 'log'
+
+# Media serving (social_media_api/media.py). Behind nginx set BACKEND to
+# 'x-accel-redirect' with an `internal` location at ACCEL_PREFIX aliasing MEDIA_ROOT;
+# 'x-sendfile' for Apache/lighttpd. None streams via FileResponse (sendfile under gunicorn).
+MEDIA_SERVE = {
+    'BACKEND': os.getenv('DJANGO_MEDIA_SENDFILE') or None,
+    'ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 24 * 60 * 60,
+}
+
 # Default primary key field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # DRF Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.tokens.SignedTokenAuthentication',  # "Bearer <signed access token>", no DB hit
+        'accounts.authentication.CachedTokenAuthentication',  # TokenAuthentication + token->user cache
         'rest_framework.authentication.SessionAuthentication',  # allow session for browsable API
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/minute',     # per username + IP (accounts/throttles.py)
+        'login_ip': '60/minute',  # per IP, across usernames
+        'register': '30/hour',    # per IP
+    },
+    # orjson when installed, DRF's json otherwise (common/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'common.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'common.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
 
-STATIC_URL = 'static/'
+# Password hashing pool for register/login (accounts/hashing.py)
+PASSWORD_HASHING_POOL = {
+    'MAX_WORKERS': 4,
+    'MAX_QUEUE': 16,
+    'TIMEOUT': 10,
+    'RETRY_AFTER': 1,
+}
 
-# Media (for profile pictures)
-MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# Response compression (common/compression.py), JSON only: HTML is left alone (BREACH)
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,  # bytes
+    'ENCODINGS': ['br', 'zstd', 'gzip', 'deflate'],  # preference order; br/zstd need brotli/zstandard
+    'LEVELS': {'br': 5, 'zstd': 3, 'gzip': 6, 'deflate': 6},
+    'CACHE': 'default',  # precompressed variants for responses that set compression_cache_key
+}
 
+# Token auth cache (accounts/authentication.py)
+TOKEN_AUTH_CACHE = {
+    'LOCAL_MAXSIZE': 1024,
+    'LOCAL_TTL': 30,            # seconds a token stays cached in-process
+    'CACHE_ALIAS': 'default',   # shared tier; None keeps it process-local only
+    'SHARED_TTL': 300,
+}
 
-AUTH_USER_MODEL = 'accounts.User'
+# Signed access/refresh tokens (accounts/tokens.py)
+# The revocation list lives in CACHE_ALIAS; use a shared backend (e.g. Redis/Memcached) with several workers.
+SIGNED_TOKENS = {
+    'ACCESS_TTL': 5 * 60,
+    'REFRESH_TTL': 14 * 24 * 60 * 60,
+    'CACHE_ALIAS': 'default',
+}
 
-# DRF
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-    ],
+# Profile picture thumbnails (accounts/images.py), generated in-process after upload
+PROFILE_THUMBNAILS = {
+    'SIZES': (64, 128, 256),
+    'FORMAT': 'WEBP',
+    'QUALITY': 80,
+    'WORKERS': 2,
 }
+
+# Home timelines (posts/timeline.py)
+# Authors above this follower count are merged at read time instead of fanned out on write.
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000
+# Posts copied into a timeline when its owner follows someone.
+TIMELINE_BACKFILL = 50